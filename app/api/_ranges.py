@@ -0,0 +1,99 @@
+import re
+from typing import Optional, Tuple
+
+__range_regex = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    """
+    Запрошенный диапазон не пересекается с файлом (ответ 416)
+    """
+
+
+def quote_etag(etag: str) -> str:
+    """
+    ETag в формате заголовка: строка в кавычках
+    """
+    etag = etag.strip('"')
+    return f'"{etag}"'
+
+
+def etag_matches_none(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """
+    Совпадает ли ETag с заголовком If-None-Match (слабое сравнение).
+    True означает, что у клиента актуальная версия и можно ответить 304
+    """
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    current = quote_etag(etag)
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False
+
+
+def if_range_matches(if_range: Optional[str], etag: Optional[str]) -> bool:
+    """
+    Можно ли отдать диапазон при заголовке If-Range (строгое сравнение ETag).
+    Даты в If-Range не поддерживаются: в этом случае отдается файл целиком
+    """
+    if not if_range:
+        return True
+    if not etag:
+        return False
+    return if_range.strip() == quote_etag(etag)
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Разбор заголовка Range
+
+    Поддерживается один диапазон: bytes=first-last, bytes=first- и bytes=-suffix.
+    Несколько диапазонов и некорректные заголовки игнорируются (файл отдается целиком)
+
+    Parameters
+    ----------
+    range_header
+        значение заголовка Range
+    size
+        размер файла в байтах
+
+    Returns
+    -------
+    пара (первый байт, последний байт) включительно или None, если отдавать нужно весь файл
+
+    Raises
+    ------
+    RangeNotSatisfiable
+        если диапазон целиком за пределами файла
+    """
+    if not range_header:
+        return None
+    match = __range_regex.match(range_header.strip().replace(" ", ""))
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Суффикс: последние N байт файла
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - suffix, 0), size - 1
+
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable()
+    last = min(int(last), size - 1) if last else size - 1
+    return first, last
@@ -1,205 +1,280 @@
+import asyncio
 from datetime import UTC, datetime, timedelta
+import json
 import logging
-import os
-from pathlib import Path
-import tempfile
-import shutil
+import mimetypes
 from typing import List, Optional, Union
+from urllib.parse import parse_qs, quote, urlparse
 
-from fastapi import APIRouter, Depends, Request, Response
+from fastapi import APIRouter, Depends, Response
 from fastapi import File as FastAPIFile
-from fastapi import Header, HTTPException, UploadFile, status
-from fastapi.responses import StreamingResponse
+from fastapi import Header, HTTPException, Query, UploadFile, status
+from fastapi.responses import RedirectResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from jose import jwt
 from jose.exceptions import JWTError
+from minio import S3Error
 
-from app.db import audio_repository
-from app.services.decoding.decoding import convert_audio
+from app.db.aio import audio_repository, user_repository
+from app.db.factory import get_pool_stats
+from app.db.pagination import InvalidCursor
+from app.db.aio.session import request_session
+from app.services.ingest import jobs
 
 from ..authorization import auth_repository
-from ..core.models.file_dto import CoverInDto, FileDto, FileCreateDto
-from ..core.config import ALGORITHM, FAST_API_DOMAIN, HLS_TOKEN_EXPIRE_MINUTES, SECRET_KEY
+from ..core.models.file_dto import AlbumTrackDto, FacetDto, FileDto
+from ..core.models.upload_job_dto import UploadJobDto, UploadJobStatus
+from ..core.config import (
+    ACCEL_REDIRECT_PREFIX,
+    ALGORITHM,
+    DOWNLOAD_MODE,
+    FAST_API_DOMAIN,
+    HLS_TOKEN_EXPIRE_MINUTES,
+    HLS_VERIFY_CACHE_SIZE,
+    HLS_VERIFY_CACHE_TTL_SECONDS,
+    MINIO_BUCKET,
+    PAGE_SIZE_MAX,
+    SECRET_KEY,
+    UPLOAD_JOB_EVENTS_POLL_SECONDS,
+)
 from ..core.models.user_dto import UserBaseDto
+from ..core.monitoring import loop_lag_monitor
+from ..core.ttl_cache import TtlCache
 from ..minio import minio_repository
-from ..minio.minio_file import MinioFile
-from ..services.archive_handler.factory import get_archive_handler
+from ..minio.minio_file_params import Chunk, Full
+from ._ranges import RangeNotSatisfiable, etag_matches_none, if_range_matches, parse_range, quote_etag
 
-fileRouter = APIRouter(prefix="/files")
-internalRouter = APIRouter(prefix="/internal")
+# Успешные проверки доступа к HLS: (токен пользователя, токен HLS, ID трека) -> ID пользователя
+__hls_verification_cache: TtlCache[str] = TtlCache(maxsize=HLS_VERIFY_CACHE_SIZE)
 
+fileRouter = APIRouter(prefix="/files", dependencies=[Depends(request_session)])
+internalRouter = APIRouter(prefix="/internal", dependencies=[Depends(request_session)])
 
-@fileRouter.post("/upload", response_model=List[FileDto])
+
+@fileRouter.post("/upload", response_model=UploadJobDto, status_code=status.HTTP_202_ACCEPTED)
 async def upload_files(
         files_list: List[UploadFile] = FastAPIFile(...),
         current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
         custom_dir: Union[str, None] = None,
 ):
     """
-    Загружает файлы и архивы (zip, tar, tar.gz, tgz, gz) в MinIO
+    Ставит в очередь загрузку файлов и архивов (zip, tar, tar.gz, tgz, gz) в MinIO.
+    Возвращает задачу, прогресс которой доступен через /upload/{job_id} и /upload/{job_id}/events
     """
-    uploaded_files_metadata = []
-
-    for file in files_list:
-        filename = file.filename.lower()
-        matched_handler = get_archive_handler(filename)
-
-        if matched_handler:
-            with tempfile.TemporaryDirectory() as tmpdir:
-                # Сохраняем zip во временный файл
-                zip_path = os.path.join(tmpdir, file.filename)
-                with open(zip_path, "wb") as f:
-                    shutil.copyfileobj(file.file, f)
-
-                data = matched_handler.extract(
-                    zip_path=zip_path,
-                    tmp_dir=tmpdir,
-                    current_user=current_user.id,
-                    custom_dir=custom_dir,
-                )
-
-                for cover in data.covers:
-                    audio_repository.create_cover_file(
-                        file=CoverInDto(
-                            id=cover.id,
-                            minio_object_name=cover.original_name,
-                        ),
-                    )
-
-                    minio_repository.put_object(
-                        MinioFile(
-                            object_name=cover.original_name,
-                            data=cover.bytes,
-                            content_type=cover.metadata.mime,
-                        )
-                    )
-                
-                minio_dir = f"{tmpdir}/minio"
-
-
-                for audio_file in data.tracks:
-
-                    convert_audio(
-                        file_id=audio_file.id,
-                        file_path=audio_file.original_name,
-                        output_path=minio_dir,
-                    )
-
-                    audio_repository.create_audio_file(
-                        file = FileCreateDto(
-                            id=audio_file.id,
-                            original_name=audio_file.original_name,
-                            size_bytes=5,
-                            minio_object_name=audio_file.id,
-                            track_title=audio_file.metadata.track_title,
-                            track_number=audio_file.metadata.track_number,
-                            artist=audio_file.metadata.artist,
-                            album=audio_file.metadata.album,
-                            mime_type=audio_file.metadata.mime,
-                            genre=audio_file.metadata.genre,
-                            cover=audio_file.cover_id,
-                        ),
-                        owner_id=current_user.id,
-                    )
-
-                    for ff in os.listdir(f"{minio_dir}/{audio_file.id}"):
-                        minio_repository.put_object(
-                            MinioFile(
-                                object_name=f"{current_user.id}/{audio_file.id}/{ff}",
-                                data=Path(f"{minio_dir}/{audio_file.id}/{ff}").read_bytes(),
-                                content_type= audio_file.metadata.mime,
-                            )
-                        )
-                
-
-                tracks = list(
-                    map(
-                        lambda tr: FileDto(
-                            id=tr.id,
-                            original_name=tr.original_name,
-                            minio_object_name=f"{current_user.id}/{tr.id}.mp3",
-                            track_title=tr.metadata.track_title,
-                            track_number=int(tr.metadata.track_number),
-                            album=tr.metadata.album,
-                            artist=tr.metadata.artist,
-                            genre=tr.metadata.genre,
-                            cover=tr.cover_id,
-                            mime_type=tr.metadata.mime,
-                        ),
-                        data.tracks,
-                    ),
-                )
-
-                uploaded_files_metadata=tracks
-
-    return uploaded_files_metadata
+    return await run_in_threadpool(
+        jobs.submit_upload_job,
+        owner_id=current_user.id,
+        files=[(file.filename, file.file) for file in files_list],
+        custom_dir=custom_dir,
+    )
+
+
+@fileRouter.get("/upload/{job_id}", response_model=UploadJobDto)
+def get_upload_job(
+        job_id: str,
+        current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
+):
+    """Состояние задачи загрузки."""
+    job = jobs.get_job(job_id=job_id, owner_id=current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    return job
+
+
+@fileRouter.get("/upload/{job_id}/events")
+async def get_upload_job_events(
+        job_id: str,
+        current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
+):
+    """Поток событий (server-sent events) о прогрессе задачи загрузки."""
+    job = await run_in_threadpool(jobs.get_job, job_id=job_id, owner_id=current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+
+    async def __events():
+        previous, current = None, job
+        while True:
+            for event in jobs.get_job_events(previous=previous, current=current):
+                yield f"event: {event.type}\ndata: {json.dumps(event.data)}\n\n"
+            if current.status in (UploadJobStatus.DONE, UploadJobStatus.FAILED):
+                break
+            await asyncio.sleep(UPLOAD_JOB_EVENTS_POLL_SECONDS)
+            next_state = await run_in_threadpool(jobs.get_job, job_id=job_id, owner_id=current_user.id)
+            if next_state is None:
+                break
+            previous, current = current, next_state
+
+    return StreamingResponse(__events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 @fileRouter.get("/all", response_model=List[FileDto])
-def get_all_files(
-        skip: int = 0,
-        limit: int = 100,
+async def get_all_files(
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=PAGE_SIZE_MAX),
         search: str = None,
+        cursor: Optional[str] = None,
+        current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
+):
+    """
+    Получает список файлов пользователя с возможностью поиска.
+    Без поиска файлы отдаются постранично по курсору (сначала новые): курсор следующей
+    страницы приходит в заголовке X-Next-Cursor. С поиском файлы отсортированы по релевантности,
+    страницы задаются через skip
+    """
+    if search or skip:
+        return await audio_repository.get_files_by_owner(
+            owner_id=current_user.id, skip=skip, limit=limit, search=search
+        )
+
+    try:
+        files, next_cursor = await audio_repository.get_files_page(
+            owner_id=current_user.id, limit=limit, cursor=cursor
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return files
+
+
+@fileRouter.get("/artists", response_model=List[FacetDto])
+async def get_artists(
+        limit: int = Query(100, ge=1, le=PAGE_SIZE_MAX),
+        after: Optional[str] = None,
+        current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
+):
+    """Артисты библиотеки с количеством треков. Следующая страница - after=<name последнего артиста>."""
+    return await audio_repository.get_artists(owner_id=current_user.id, limit=limit, after=after)
+
+
+@fileRouter.get("/albums", response_model=List[FacetDto])
+async def get_albums(
+        limit: int = Query(100, ge=1, le=PAGE_SIZE_MAX),
+        after: Optional[str] = None,
         current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
 ):
-    """Получает список файлов пользователя с возможностью поиска."""
-    return audio_repository.get_files_by_owner(owner_id=current_user.id, skip=skip, limit=limit, search=search)
+    """Альбомы библиотеки с количеством треков. Следующая страница - after=<name последнего альбома>."""
+    return await audio_repository.get_albums(owner_id=current_user.id, limit=limit, after=after)
+
+
+@fileRouter.get("/albums/tracks", response_model=List[AlbumTrackDto])
+async def get_album_tracks(
+        album: str,
+        current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
+):
+    """Треки альбома, упорядоченные по номеру трека."""
+    return await audio_repository.get_album_tracks(owner_id=current_user.id, album=album)
+
+
+@fileRouter.get("/genres", response_model=List[FacetDto])
+async def get_genres(
+        limit: int = Query(100, ge=1, le=PAGE_SIZE_MAX),
+        after: Optional[str] = None,
+        current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
+):
+    """Жанры библиотеки с количеством треков. Следующая страница - after=<name последнего жанра>."""
+    return await audio_repository.get_genres(owner_id=current_user.id, limit=limit, after=after)
 
 
 @fileRouter.get("/get", response_model=FileDto)
 async def get_file(
         file_id: str,
         range_header: Optional[str] = Header(None, alias="Range"),
+        if_range: Optional[str] = Header(None, alias="If-Range"),
+        if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
         current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
 ):
-    """Скачивает файл, поддерживая частичную загрузку (byte range)."""
-
-    from ..minio.minio_file_params import Chunk, Full
-
-    db_file = audio_repository.get_file(file_id=file_id)
+    """
+    Скачивает файл, поддерживая частичную загрузку (byte range) и условные запросы (If-None-Match, If-Range).
+    """
+    db_file = await audio_repository.get_file(file_id=file_id)
     if db_file is None:
         raise HTTPException(status_code=404, detail="File not found")
     if db_file.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to access this file")
 
+    redirect = __redirect_to_storage(object_name=db_file.minio_object_name, content_type=db_file.mime_type)
+    if redirect:
+        return redirect
+
+    headers = {"Accept-Ranges": "bytes"}
+    if db_file.etag:
+        headers["ETag"] = quote_etag(db_file.etag)
+
+    if etag_matches_none(if_none_match, db_file.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
     try:
-        if range_header:
-            # Частичная загрузка
-            import re
-
-            byte1, byte2 = 0, db_file.size_bytes - 1
-            match = re.search(r"(\d+)-(\d*)", range_header)
-            if match:
-                g1, g2 = match.groups()
-                if g1:
-                    byte1 = int(g1)
-                if g2:
-                    byte2 = int(g2)
-
-            length = byte2 - byte1 + 1
-            stream = minio_repository.get_object(
-                object_name=db_file.minio_object_name,
-                params=Chunk(first_byte=byte1, length=length),
-            )
+        byte_range = parse_range(range_header, db_file.size_bytes) if if_range_matches(if_range, db_file.etag) else None
+    except RangeNotSatisfiable:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{db_file.size_bytes}"},
+        )
+
+    if byte_range:
+        # Частичная загрузка
+        first_byte, last_byte = byte_range
+        params = Chunk(first_byte=first_byte, length=last_byte - first_byte + 1)
+        headers["Content-Range"] = f"bytes {first_byte}-{last_byte}/{db_file.size_bytes}"
+        headers["Content-Length"] = str(params.length)
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+    else:
+        # Полная загрузка
+        params = Full()
+        headers["Content-Length"] = str(db_file.size_bytes)
+        status_code = status.HTTP_200_OK
 
-            headers = {
-                "Content-Range": f"bytes {byte1}-{byte2}/{db_file.size_bytes}",
-                "Accept-Ranges": "bytes",
-                "Content-Length": str(length),
-                "Content-Type": db_file.mime_type,
-            }
-            return StreamingResponse(stream, status_code=206, headers=headers, media_type=db_file.mime_type)
-        else:
-            # Полная загрузка
-            stream = minio_repository.get_object(
-                object_name=db_file.minio_object_name,
-                params=Full(file_length=db_file.size_bytes),
-            )
-            return StreamingResponse(stream, media_type=db_file.mime_type)
+    try:
+        stream = await run_in_threadpool(
+            minio_repository.get_object,
+            object_name=db_file.minio_object_name,
+            params=params,
+        )
+    except S3Error as e:
+        if e.code == "NoSuchKey":
+            raise HTTPException(status_code=404, detail="File not found in storage")
+        logging.error(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Тело отдается по мере чтения из MinIO, соединение освобождается после отправки
+    return StreamingResponse(stream, status_code=status_code, headers=headers, media_type=db_file.mime_type)
+
+
+@fileRouter.get("/cover/{cover_id}")
+async def get_cover(
+        cover_id: str,
+        current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
+):
+    """Скачивает обложку трека."""
+    db_cover = await audio_repository.get_cover(cover_id=cover_id)
+    if db_cover is None:
+        raise HTTPException(status_code=404, detail="Cover not found")
+    # Обложки лежат в MinIO в директории пользователя: <user>/covers/<id>.jpg
+    if not db_cover.minio_object_name.startswith(f"{current_user.id}/covers/"):
+        raise HTTPException(status_code=403, detail="Not authorized to access this cover")
+
+    content_type = mimetypes.guess_type(db_cover.minio_object_name)[0] or "application/octet-stream"
+    redirect = __redirect_to_storage(object_name=db_cover.minio_object_name, content_type=content_type)
+    if redirect:
+        return redirect
 
-    except Exception as e:
+    try:
+        stream = await run_in_threadpool(
+            minio_repository.get_object,
+            object_name=db_cover.minio_object_name,
+            params=Full(),
+        )
+    except S3Error as e:
+        if e.code == "NoSuchKey":
+            raise HTTPException(status_code=404, detail="Cover not found in storage")
         logging.error(e)
         raise HTTPException(status_code=500, detail=str(e))
 
+    return StreamingResponse(stream, media_type=content_type)
+
 
 @fileRouter.delete("/remove", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_file(
@@ -207,24 +282,24 @@ async def delete_file(
         current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
 ):
     """Удаляет файл из MinIO и его метаданные из PostgreSQL."""
-    db_file = audio_repository.get_file(file_id=file_id)
+    db_file = await audio_repository.get_file(file_id=file_id)
     if db_file is None:
         raise HTTPException(status_code=404, detail="File not found")
     if db_file.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this file")
 
     # Удаление из MinIO
-    minio_repository.remove_object(object_name=db_file.minio_object_name)
+    await run_in_threadpool(minio_repository.remove_object, object_name=db_file.minio_object_name)
 
     # Удаление из БД
-    audio_repository.delete_file(file_id=file_id)
+    await audio_repository.delete_file(file_id=file_id)
 
     return
 
 
 @fileRouter.get("/all_files", response_model=List[FileDto])
 async def files():
-    return audio_repository.get_all_files()
+    return await audio_repository.get_all_files()
 
 @fileRouter.get("/play/{track_id}")
 async def get_playlist_url(
@@ -246,58 +321,99 @@ async def get_playlist_url(
 
 @internalRouter.get("/verify-hls")
 async def verify_hls_token(
-    request: Request,
     x_original_uri: str | None = Header(None),
-    current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
+    access_token: str = Depends(auth_repository.get_access_token),
 ):
     """
     Внутренний эндпоинт для проверки токена доступа к HLS.
-    Вызывается Nginx через auth_request.
+    Вызывается Nginx через auth_request для плейлиста и каждого сегмента.
+    Успешные проверки кэшируются по (токен пользователя, токен HLS, ID трека),
+    поэтому повторные запросы обходятся без БД и декодирования JWT
     """
-    user_id = current_user.id
-
     if not x_original_uri:
         raise HTTPException(status_code=400, detail="Missing X-Original-URI header")
 
-    try:
-        # Nginx передает нам оригинальный URI, например /hls/track123/playlist.m3u8?token=...
-        # 1. Извлекаем токен из query-параметров
-        backend_token = None
-        if x_original_uri and "token=" in x_original_uri:
-            from urllib.parse import parse_qs, urlparse
-            query = urlparse(x_original_uri).query
-            backend_token = parse_qs(query).get("token", [None])[0]
-        if not backend_token:
-            raise HTTPException(status_code=401, detail="Token not found")
-
-        # 2. Извлекаем ID трека из пути URI
-        # /hls/track123/playlist.m3u8 -> track123
-        path_parts = x_original_uri.split("?")[0].split("/")
-        # path_parts будет ['','hls','track123', 'playlist.m3u8']
-        if len(path_parts) < 3 or path_parts[1] != 'hls':
-            raise HTTPException(status_code=400, detail="Invalid URI format")
-        track_id_from_url = path_parts[2]
+    backend_token, track_id_from_url = __parse_hls_uri(x_original_uri)
 
-        # 3. Декодируем и валидируем токен
-        payload = jwt.decode(backend_token, SECRET_KEY, algorithms=[ALGORITHM])
-        track_id_from_token: str = payload.get("subject")
+    cache_key = (access_token, backend_token, track_id_from_url)
+    user_id = __hls_verification_cache.get(cache_key)
+    if user_id is None:
+        user = await auth_repository.get_current_active_user(token=access_token)
+        user_id = user.id
 
-        # 4. Главная проверка: ID трека в токене должен совпадать с ID трека в URL
+        try:
+            # Декодируем и валидируем токен
+            payload = jwt.decode(backend_token, SECRET_KEY, algorithms=[ALGORITHM])
+            track_id_from_token: str = payload.get("subject")
+            access_expire = jwt.get_unverified_claims(access_token).get("exp")
+        except JWTError:
+            raise HTTPException(status_code=403, detail="Invalid or expired token")
+
+        # Главная проверка: ID трека в токене должен совпадать с ID трека в URL
         if track_id_from_token != track_id_from_url:
             raise HTTPException(status_code=403, detail="Token-URL mismatch")
 
-    except JWTError:
-        raise HTTPException(status_code=403, detail="Invalid or expired token")
-    except HTTPException as e:
-        # Перехватываем свои же ошибки, чтобы Nginx получил правильный код
-        raise e
-    except Exception:
-        # На случай непредвиденных ошибок парсинга
-        raise HTTPException(status_code=400, detail="Bad request")
+        # Запись не должна пережить ни один из токенов
+        expires = [payload["exp"]] + ([access_expire] if access_expire else [])
+        ttl = min(HLS_VERIFY_CACHE_TTL_SECONDS, min(expires) - datetime.now(UTC).timestamp())
+        __hls_verification_cache.set(cache_key, user_id, ttl=ttl)
 
     # Если все проверки пройдены, возвращаем 200 OK. Nginx получит этот ответ
     # и продолжит выполнение запроса (отдаст файл из MinIO).
     response = Response(status_code=200)
     response.headers["X-User-ID"] = user_id
     return response
-    
\ No newline at end of file
+
+
+@internalRouter.get("/metrics")
+async def get_metrics():
+    """
+    Внутренние метрики процесса API
+    """
+    return {
+        "event_loop": loop_lag_monitor.stats(),
+        "db_pool": get_pool_stats(),
+        "hls_verification_cache": __hls_verification_cache.stats(),
+        "user_cache": user_repository.get_user_cache_stats(),
+    }
+
+
+def __redirect_to_storage(object_name: str, content_type: str) -> Optional[Response]:
+    """
+    Ответ, перенаправляющий скачивание объекта мимо API (в зависимости от DOWNLOAD_MODE).
+    Вызывается только после проверки прав доступа. Вернет None в режиме proxy
+    """
+    match DOWNLOAD_MODE:
+        case "presigned":
+            url = minio_repository.get_presigned_url(object_name=object_name, content_type=content_type)
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+        case "accel":
+            # Заголовки Range и условные заголовки клиента nginx передаст в MinIO сам
+            return Response(
+                headers={
+                    "X-Accel-Redirect": f"{ACCEL_REDIRECT_PREFIX}/{MINIO_BUCKET}/{quote(object_name)}",
+                    "Content-Type": content_type,
+                }
+            )
+    return None
+
+
+def __parse_hls_uri(uri: str) -> tuple[str, str]:
+    """
+    Токен и ID трека из оригинального URI запроса к HLS.
+    Nginx передает URI вида /hls/track123/playlist.m3u8?token=...
+    """
+    try:
+        parsed = urlparse(uri)
+        backend_token = parse_qs(parsed.query).get("token", [None])[0]
+        # path_parts будет ['','hls','track123', 'playlist.m3u8']
+        path_parts = parsed.path.split("/")
+    except Exception:
+        # На случай непредвиденных ошибок парсинга
+        raise HTTPException(status_code=400, detail="Bad request")
+
+    if not backend_token:
+        raise HTTPException(status_code=401, detail="Token not found")
+    if len(path_parts) < 3 or path_parts[1] != "hls":
+        raise HTTPException(status_code=400, detail="Invalid URI format")
+    return backend_token, path_parts[2]
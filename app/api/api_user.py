@@ -1,17 +1,19 @@
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 
-from app.db import audio_repository
+from app.db.aio import audio_repository
+from app.db.aio.session import request_session
 
 from ..authorization import auth_repository
 from ..authorization.token_dto import TokenDto
 from ..core.models.user_dto import UserBaseDto, UserCreateDto, UserWithFilesDto
-from ..db import user_repository
+from ..db.aio import user_repository
 from ..minio import minio_repository
 
-authRouter = APIRouter(prefix="/user")
+authRouter = APIRouter(prefix="/user", dependencies=[Depends(request_session)])
 
 
 @authRouter.post("/auth", response_model=TokenDto)
@@ -34,11 +36,11 @@ def login_for_access_token(
 
 
 @authRouter.post("/register", response_model=TokenDto)
-def create_user(user: UserCreateDto):
+async def create_user(user: UserCreateDto):
     """
     Создает пользователя
     """
-    db_user = user_repository.get_user_by_username(username=user.username)
+    db_user = await user_repository.get_user_by_username(username=user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     access_token = auth_repository.create_access_token(data={"user_id": user.id})
@@ -46,24 +48,26 @@ def create_user(user: UserCreateDto):
 
 
 @authRouter.delete("/delete", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
+async def delete_user(
     current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
 ):
-    user_repository.delete_user(user_id=current_user.id)
-    minio_repository.remove_files_by_user(username=current_user.id)
+    await user_repository.delete_user(user_id=current_user.id)
+    await run_in_threadpool(minio_repository.remove_files_by_user, username=current_user.id)
 
 
 @authRouter.get("/me", response_model=UserWithFilesDto)
-def get_full_user_data(
+async def get_full_user_data(
     current_user: UserBaseDto = Depends(auth_repository.get_current_active_user),
 ):
+    stats = await audio_repository.get_library_stats(owner_id=current_user.id)
     return UserWithFilesDto(
         id=current_user.id,
         username=current_user.username,
-        features=audio_repository.get_feature_awailability(owner_id=current_user.id),
+        features=stats.features(),
+        stats=stats,
     )
 
 
 @authRouter.get("/list", response_model=List[UserBaseDto])
-def list_users():
-    return user_repository.get_all_users()
+async def list_users():
+    return await user_repository.get_all_users()
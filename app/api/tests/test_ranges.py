@@ -0,0 +1,39 @@
+import unittest
+
+from app.api._ranges import RangeNotSatisfiable, etag_matches_none, if_range_matches, parse_range
+
+
+class TestParseRange(unittest.TestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=500-", 1000), (500, 999))
+        self.assertEqual(parse_range("bytes=900-5000", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-5000", 1000), (0, 999))
+
+    def test_ignored(self):
+        self.assertIsNone(parse_range(None, 1000))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 1000))
+        self.assertIsNone(parse_range("items=0-1", 1000))
+        self.assertIsNone(parse_range("bytes=10-1", 1000))
+        self.assertIsNone(parse_range("bytes=-", 1000))
+
+    def test_not_satisfiable(self):
+        for header in ("bytes=1000-", "bytes=-0", "bytes=2000-3000"):
+            with self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, 1000)
+
+
+class TestConditions(unittest.TestCase):
+    def test_if_none_match(self):
+        self.assertTrue(etag_matches_none('"abc"', "abc"))
+        self.assertTrue(etag_matches_none('W/"abc", "def"', "abc"))
+        self.assertTrue(etag_matches_none("*", "abc"))
+        self.assertFalse(etag_matches_none('"def"', "abc"))
+        self.assertFalse(etag_matches_none('"abc"', None))
+
+    def test_if_range(self):
+        self.assertTrue(if_range_matches(None, "abc"))
+        self.assertTrue(if_range_matches('"abc"', "abc"))
+        self.assertFalse(if_range_matches('W/"abc"', "abc"))
+        self.assertFalse(if_range_matches("Wed, 21 Oct 2015 07:28:00 GMT", "abc"))
@@ -9,12 +9,20 @@ from app.core import config
 
 from ..core.models.user_dto import UserBaseDto
 from ..db import user_repository
+from ..db.aio import user_repository as async_user_repository
 
 # Схема аутентификации OAuth2. 'tokenUrl' указывает на наш эндпоинт получения токена.
 __oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/user/auth")
 
 
-def get_current_active_user(token: str = Depends(__oauth2_scheme)):
+def get_access_token(token: str = Depends(__oauth2_scheme)) -> str:
+    """
+    Dependency для получения токена из запроса без проверки пользователя в БД
+    """
+    return token
+
+
+async def get_current_active_user(token: str = Depends(__oauth2_scheme)):
     """
     Dependency для получения текущего пользователя из токена
     """
@@ -30,7 +38,7 @@ def get_current_active_user(token: str = Depends(__oauth2_scheme)):
     except JWTError:
         raise credentials_exception
 
-    user = user_repository.get_user_by_id(user_id=user_id)
+    user = await async_user_repository.get_user_by_id(user_id=user_id)
     if user is None:
         raise credentials_exception
     return user
@@ -10,6 +10,18 @@ POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 POSTGRES_SERVER = os.getenv("POSTGRES_SERVER", "db")  # 'db' - имя сервиса в docker-compose
 POSTGRES_DB = os.getenv("POSTGRES_DB")
 DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}"
+# Пул соединений (для каждого движка: синхронного и асинхронного)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# Сколько секунд ждать свободного соединения, прежде чем вернуть ошибку
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+# Соединения старше стольких секунд пересоздаются
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Проверять соединение перед выдачей из пула
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Максимальный размер страницы в списках файлов
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 500))
 
 # MinIO
 MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "minio:9000")
@@ -17,11 +29,86 @@ MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY")
 MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY")
 MINIO_BUCKET = os.getenv("MINIO_BUCKET", "userfiles")
 MINIO_USE_HTTPS = os.getenv("MINIO_USE_HPPTS")
+# Адрес MinIO, доступный клиентам. Используется для подписанных ссылок на скачивание
+MINIO_PUBLIC_ENDPOINT = os.getenv("MINIO_PUBLIC_ENDPOINT", MINIO_ENDPOINT)
+MINIO_PUBLIC_USE_HTTPS = os.getenv("MINIO_PUBLIC_USE_HTTPS", "false").lower() == "true"
+# Регион бакета. Если он задан, ссылки подписываются без запроса к MinIO
+MINIO_REGION = os.getenv("MINIO_REGION", "us-east-1")
+
+# Скачивание файлов
+# proxy - тело файла проксируется через API
+# presigned - API отвечает 307 на подписанную ссылку MinIO
+# accel - API отвечает заголовком X-Accel-Redirect, файл из MinIO отдает nginx
+DOWNLOAD_MODE = os.getenv("DOWNLOAD_MODE", "proxy")
+# Время жизни подписанной ссылки на скачивание
+PRESIGNED_URL_EXPIRE_SECONDS = int(os.getenv("PRESIGNED_URL_EXPIRE_SECONDS", 300))
+# internal location nginx, проксирующий запросы в MinIO: <prefix>/<bucket>/<object>
+ACCEL_REDIRECT_PREFIX = os.getenv("ACCEL_REDIRECT_PREFIX", "/minio-internal")
 
 # JWT
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
+# Кэш пользователей, по которым проверяются токены. Удаление пользователя сбрасывает
+# запись в текущем процессе, в остальных процессах она живет не дольше USER_CACHE_TTL_SECONDS
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", 60))
 
 # HLS
 HLS_TOKEN_EXPIRE_MINUTES = int(os.getenv("HLS_TOKEN_EXPIRE_MINUTES"))
 FAST_API_DOMAIN = os.getenv("FAST_API_DOMAIN")
+# Кэш проверок доступа к HLS (auth_request nginx). Запись живет не дольше токенов,
+# по которым она создана, и не дольше HLS_VERIFY_CACHE_TTL_SECONDS
+HLS_VERIFY_CACHE_SIZE = int(os.getenv("HLS_VERIFY_CACHE_SIZE", 10000))
+HLS_VERIFY_CACHE_TTL_SECONDS = int(os.getenv("HLS_VERIFY_CACHE_TTL_SECONDS", 60))
+
+# Транскодирование
+TRANSCODE_WORKERS = int(os.getenv("TRANSCODE_WORKERS", os.cpu_count() or 1))
+# Кодеки, которые можно нарезать в HLS без перекодирования
+HLS_STREAM_COPY_CODECS = set(os.getenv("HLS_STREAM_COPY_CODECS", "mp3,aac").split(","))
+# Максимальный битрейт аудио в HLS. Источники с битрейтом выше перекодируются
+HLS_MAX_BIT_RATE = int(os.getenv("HLS_MAX_BIT_RATE", 320000))
+
+# Задачи загрузки
+# Количество воркеров, которые обрабатывают задачи внутри процесса API. 0 - задачи обрабатывают только
+# отдельные воркеры (python -m app.worker). Встроенные воркеры разбирают архивы и теги в потоках процесса API
+# и конкурируют с event loop за GIL (растет задержка, см. LOOP_LAG_WARN_MS), поэтому по умолчанию выключены.
+# Без отдельного воркера задачи останутся в очереди, пока значение не станет больше 0
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", 0))
+# Количество воркеров в отдельном процессе python -m app.worker
+INGEST_WORKER_THREADS = int(os.getenv("INGEST_WORKER_THREADS", 2))
+# Время хранения завершенных задач загрузки в БД
+UPLOAD_JOB_TTL_SECONDS = int(os.getenv("UPLOAD_JOB_TTL_SECONDS", 3600))
+# Префикс в MinIO, под которым архивы ждут обработки воркером
+UPLOAD_STAGING_PREFIX = os.getenv("UPLOAD_STAGING_PREFIX", "uploads")
+# Период опроса очереди свободным воркером
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 2))
+# Период, с которым воркер сохраняет прогресс и продлевает захват задачи
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", 5))
+# Задача, по которой так долго не было heartbeat, считается брошенной и захватывается заново
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 60))
+# Количество попыток выполнения задачи
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+# Базовая задержка перед повтором, удваивается с каждой попыткой
+JOB_RETRY_BASE_SECONDS = int(os.getenv("JOB_RETRY_BASE_SECONDS", 10))
+# Период опроса задачи при отправке событий о прогрессе клиенту
+UPLOAD_JOB_EVENTS_POLL_SECONDS = float(os.getenv("UPLOAD_JOB_EVENTS_POLL_SECONDS", 0.5))
+
+# Event loop
+# Размер пула потоков, в котором выполняются синхронные эндпоинты и зависимости
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", 40))
+# Период измерения задержки event loop
+LOOP_LAG_INTERVAL_SECONDS = float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", 0.1))
+# Задержка event loop, при превышении которой пишется предупреждение
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", 5))
+
+# MinIO
+# Количество потоков для параллельной загрузки файлов в MinIO (общее на процесс)
+MINIO_UPLOAD_WORKERS = int(os.getenv("MINIO_UPLOAD_WORKERS", 8))
+# Размер части multipart-загрузки в байтах (не меньше 5 МиБ). Объекты больше части
+# и объекты неизвестного размера загружаются по частям
+MINIO_PART_SIZE = int(os.getenv("MINIO_PART_SIZE", 16 * 1024 * 1024))
+# Количество частей одного объекта, загружаемых параллельно. В памяти держится не больше
+# одной части на поток
+MINIO_PARALLEL_PARTS = int(os.getenv("MINIO_PARALLEL_PARTS", 3))
+# Размер куска, которым тело объекта из MinIO отдается клиенту при скачивании
+MINIO_DOWNLOAD_CHUNK_SIZE = int(os.getenv("MINIO_DOWNLOAD_CHUNK_SIZE", 64 * 1024))
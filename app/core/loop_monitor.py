@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopLagMonitor:
+    """
+    Измеряет задержку event loop: засыпает на interval секунд и считает, насколько позже запланированного
+    времени loop вернул управление. Задержка больше нуля означает, что loop был занят блокирующим кодом
+
+    Parameters
+    ----------
+    interval
+        период измерения в секундах
+    warn_threshold_ms
+        задержка в миллисекундах, при превышении которой пишется предупреждение
+    window
+        количество последних измерений, по которым считается статистика
+    """
+
+    def __init__(self, interval: float, warn_threshold_ms: float, window: int = 600):
+        self.interval = interval
+        self.warn_threshold_ms = warn_threshold_ms
+        self.max_lag_ms = 0.0
+        self.__samples: Deque[float] = deque(maxlen=window)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record((loop.time() - started - self.interval) * 1000)
+
+    def record(self, lag_ms: float):
+        lag_ms = max(lag_ms, 0.0)
+        self.__samples.append(lag_ms)
+        self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+        if lag_ms > self.warn_threshold_ms:
+            logger.warning(f"Event loop was blocked for {lag_ms:.1f} ms")
+
+    def stats(self) -> dict[str, float]:
+        """
+        Статистика задержки в миллисекундах по последним измерениям и максимум за все время
+        """
+        samples = sorted(self.__samples)
+        if not samples:
+            return {"last_ms": 0.0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": self.max_lag_ms}
+        return {
+            "last_ms": self.__samples[-1],
+            "p50_ms": samples[len(samples) // 2],
+            "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+            "max_ms": self.max_lag_ms,
+        }
@@ -23,6 +23,10 @@ class FileCreateDto(BaseModel):
         размер файла в байтах
     mime_type
         mime тип файла
+    etag
+        ETag объекта в MinIO
+    duration
+        длительность трека в секундах
     track_title
         название трека из метаданных файла
     track_number
@@ -40,6 +44,8 @@ class FileCreateDto(BaseModel):
     minio_object_name: str
     size_bytes: int
     mime_type: str
+    etag: Optional[str] = None
+    duration: Optional[float] = None
 
     track_title: Optional[str]
     track_number: int
@@ -91,3 +97,37 @@ class FileWithHierarchyDto(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class FacetDto(BaseModel):
+    """
+    Группа треков библиотеки с общим артистом, альбомом или жанром
+
+    Attributes
+    ----------
+    name
+        название артиста, альбома или жанра
+    tracks
+        количество треков в группе
+    cover
+        id обложки одного из треков группы
+    """
+
+    name: str
+    tracks: int
+    cover: Optional[str] = None
+
+
+class AlbumTrackDto(BaseModel):
+    """
+    Трек в списке треков альбома
+    """
+
+    id: str
+    track_title: Optional[str]
+    track_number: Optional[int]
+    duration: Optional[float]
+    cover: Optional[str] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+
+
+class LibraryStatsDto(BaseModel):
+    """
+    Статистика библиотеки пользователя
+
+    Attributes
+    ----------
+    tracks
+        количество треков
+    albums
+        количество уникальных альбомов
+    artists
+        количество уникальных артистов
+    genres
+        количество уникальных жанров
+    total_bytes
+        суммарный размер треков в байтах
+    """
+
+    tracks: int = 0
+    albums: int = 0
+    artists: int = 0
+    genres: int = 0
+    total_bytes: int = 0
+
+    def features(self) -> dict[str, bool]:
+        """
+        Какие разделы библиотеки есть у пользователя
+        """
+        return {
+            "tracks": self.tracks > 0,
+            "genres": self.genres > 0,
+            "albums": self.albums > 0,
+            "artists": self.artists > 0,
+        }
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,53 @@
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from .file_dto import FileDto
+
+
+class UploadJobStatus(str, Enum):
+    """
+    Статус задачи загрузки
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class TrackProgressDto(BaseModel):
+    """
+    Состояние обработки одного трека задачи загрузки
+    """
+
+    track_id: str
+    original_name: str
+    stage: str
+    error: Optional[str] = None
+
+
+class UploadJobDto(BaseModel):
+    """
+    Схема задачи загрузки для ответа API
+
+    Attributes
+    ----------
+    id
+        id задачи
+    status
+        статус задачи
+    tracks
+        состояние каждого найденного трека
+    files
+        метаданные загруженных треков. Заполняется после завершения задачи
+    error
+        описание ошибки, если задача завершилась неудачно
+    """
+
+    id: str
+    status: UploadJobStatus
+    tracks: List[TrackProgressDto]
+    files: List[FileDto]
+    error: Optional[str] = None
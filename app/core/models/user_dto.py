@@ -2,6 +2,8 @@ from typing import Optional
 
 from pydantic import BaseModel, Field
 
+from .library_stats_dto import LibraryStatsDto
+
 
 class UserBaseDto(BaseModel):
     """
@@ -28,6 +30,7 @@ class UserWithFilesDto(BaseModel):
     id: str
     username: str
     features: dict[str, bool]
+    stats: LibraryStatsDto
 
 
 class UserCreateDto(BaseModel):
@@ -0,0 +1,8 @@
+from . import config
+from .loop_monitor import EventLoopLagMonitor
+
+# Задержка event loop процесса API
+loop_lag_monitor = EventLoopLagMonitor(
+    interval=config.LOOP_LAG_INTERVAL_SECONDS,
+    warn_threshold_ms=config.LOOP_LAG_WARN_MS,
+)
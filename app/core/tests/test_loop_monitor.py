@@ -0,0 +1,33 @@
+import asyncio
+import time
+import unittest
+
+from app.core.loop_monitor import EventLoopLagMonitor
+
+
+class TestEventLoopLagMonitor(unittest.TestCase):
+    def test_stats(self):
+        monitor = EventLoopLagMonitor(interval=0.01, warn_threshold_ms=1000)
+        for lag in [1.0, 3.0, 2.0, -0.5]:
+            monitor.record(lag)
+
+        stats = monitor.stats()
+
+        self.assertEqual(stats["last_ms"], 0.0)
+        self.assertEqual(stats["p50_ms"], 2.0)
+        self.assertEqual(stats["max_ms"], 3.0)
+
+    def test_detects_blocking_call(self):
+        monitor = EventLoopLagMonitor(interval=0.01, warn_threshold_ms=1000)
+
+        async def scenario():
+            task = asyncio.create_task(monitor.run())
+            await asyncio.sleep(0.05)
+            # Блокирующий вызов прямо в event loop
+            time.sleep(0.1)
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+        asyncio.run(scenario())
+
+        self.assertGreaterEqual(monitor.stats()["max_ms"], 50)
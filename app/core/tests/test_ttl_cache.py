@@ -0,0 +1,44 @@
+import unittest
+
+from app.core.ttl_cache import TtlCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTtlCache(unittest.TestCase):
+    def test_expiration(self):
+        clock = FakeClock()
+        cache = TtlCache(maxsize=10, clock=clock)
+        cache.set("a", 1, ttl=5)
+        cache.set("b", 2, ttl=0)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        clock.now = 5
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats(), {"size": 0, "hits": 1, "misses": 2})
+
+    def test_evicts_least_recently_used(self):
+        cache = TtlCache(maxsize=2, clock=FakeClock())
+        cache.set("a", 1, ttl=5)
+        cache.set("b", 2, ttl=5)
+        cache.get("a")
+        cache.set("c", 3, ttl=5)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_pop(self):
+        cache = TtlCache(maxsize=2, clock=FakeClock())
+        cache.set("a", 1, ttl=5)
+        cache.pop("a")
+        cache.pop("missing")
+
+        self.assertIsNone(cache.get("a"))
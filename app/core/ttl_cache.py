@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class TtlCache(Generic[V]):
+    """
+    Кэш в памяти процесса с временем жизни у каждой записи
+
+    Просроченные записи удаляются при обращении к ним. Когда кэш заполнен, вытесняется
+    запись, к которой дольше всего не обращались. Потокобезопасен
+
+    Parameters
+    ----------
+    maxsize
+        максимальное количество записей
+    clock
+        источник времени в секундах (подменяется в тестах)
+    """
+
+    def __init__(self, maxsize: int, clock: Callable[[], float] = time.monotonic):
+        self.__maxsize = maxsize
+        self.__clock = clock
+        self.__items: OrderedDict[Hashable, Tuple[float, V]] = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """
+        Значение по ключу или None, если записи нет или она просрочена
+        """
+        with self.__lock:
+            item = self.__items.get(key)
+            if item is None:
+                self.__misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= self.__clock():
+                del self.__items[key]
+                self.__misses += 1
+                return None
+            self.__items.move_to_end(key)
+            self.__hits += 1
+            return value
+
+    def set(self, key: Hashable, value: V, ttl: float):
+        """
+        Сохранение значения на ttl секунд. Записи с неположительным ttl не сохраняются
+        """
+        if ttl <= 0:
+            return
+        with self.__lock:
+            self.__items[key] = (self.__clock() + ttl, value)
+            self.__items.move_to_end(key)
+            while len(self.__items) > self.__maxsize:
+                self.__items.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        """
+        Удаление записи
+        """
+        with self.__lock:
+            self.__items.pop(key, None)
+
+    def clear(self):
+        """
+        Удаление всех записей
+        """
+        with self.__lock:
+            self.__items.clear()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Размер кэша и количество попаданий и промахов
+        """
+        with self.__lock:
+            return {"size": len(self.__items), "hits": self.__hits, "misses": self.__misses}
@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from typing import List
 
-from sqlalchemy import BigInteger, DateTime, ForeignKey, SmallInteger, String
+from sqlalchemy import JSON, BigInteger, Computed, DateTime, Float, ForeignKey, Index, Integer, SmallInteger, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -66,21 +66,51 @@ class AudioFileDbEntity(Base):
         размер файла в байтах
     mime_type
         mime тип файла
+    etag
+        ETag объекта в MinIO. Используется для условных запросов при скачивании
+    duration
+        длительность трека в секундах
     created_at
         время создания файла
     owner_id
         id пользователя, который загрузил файл
     owner
         ссылка на модель овнера. Связь только для каскадного удаления, без необходимости тянуть весь объект
+    search_text
+        текст для поиска: название, артист, альбом, жанр и путь в нижнем регистре.
+        Вычисляется БД, индексируется триграммным GIN-индексом (pg_trgm)
     """
 
     __tablename__ = "files"
+    __table_args__ = (
+        # Постраничный вывод библиотеки (keyset pagination)
+        Index("ix_files_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        # Группировка библиотеки по артистам, альбомам и жанрам
+        Index("ix_files_owner_id_artist", "owner_id", "artist"),
+        # Треки альбома по порядку читаются только из индекса (index-only scan)
+        Index(
+            "ix_files_owner_id_album_track_number",
+            "owner_id",
+            "album",
+            "track_number",
+            postgresql_include=["id", "track_title", "duration", "cover"],
+        ),
+        Index("ix_files_owner_id_genre", "owner_id", "genre"),
+        Index(
+            "ix_files_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
     original_name: Mapped[str] = mapped_column(String, nullable=False)
     minio_object_name: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
     mime_type: Mapped[str] = mapped_column(String, nullable=False)
+    etag: Mapped[str] = mapped_column(String, nullable=True)
+    duration: Mapped[float] = mapped_column(Float, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     track_title: Mapped[str] = mapped_column(String, nullable=True)
@@ -93,6 +123,17 @@ class AudioFileDbEntity(Base):
     owner_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
     owner: Mapped["UserDbEntity"] = relationship(back_populates="files")
 
+    search_text: Mapped[str] = mapped_column(
+        String,
+        Computed(
+            "lower("
+            "coalesce(track_title, '') || ' ' || coalesce(artist, '') || ' ' || "
+            "coalesce(album, '') || ' ' || coalesce(genre, '') || ' ' || original_name"
+            ")",
+            persisted=True,
+        ),
+    )
+
 
 class CoverFileDbEntity(Base):
     """
@@ -102,3 +143,118 @@ class CoverFileDbEntity(Base):
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
     minio_object_name = mapped_column(String, nullable=False, unique=True)
+
+
+class UploadJobDbEntity(Base):
+    """
+    Задача загрузки архивов. Таблица используется как очередь: воркеры захватывают задачи
+    через SELECT ... FOR UPDATE SKIP LOCKED
+
+    Attributes
+    ----------
+    id
+        уникальный идентификатор задачи
+    owner_id
+        id пользователя, который загрузил архивы
+    status
+        статус задачи (UploadJobStatus)
+    custom_dir
+        дополнительная директория для треков архивов
+    archives
+        архивы задачи: список {"name": имя архива, "object_name": имя архива в MinIO}
+    done_archives
+        количество полностью обработанных архивов. При повторе обработанные архивы пропускаются
+    tracks
+        прогресс обработки треков: {track_id: TrackProgressDto}
+    files
+        метаданные загруженных треков (FileDto)
+    error
+        описание последней ошибки
+    attempts
+        количество начатых попыток выполнения
+    run_after
+        время, раньше которого задачу нельзя захватывать (задержка перед повтором)
+    locked_by
+        id воркера, который выполняет задачу
+    heartbeat_at
+        время последнего heartbeat воркера. Задача с устаревшим heartbeat захватывается заново
+    created_at
+        время создания задачи
+    finished_at
+        время завершения задачи
+    """
+
+    __tablename__ = "upload_jobs"
+    __table_args__ = (Index("ix_upload_jobs_status_run_after", "status", "run_after"),)
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)
+    owner_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    custom_dir: Mapped[str] = mapped_column(String, nullable=True)
+    archives: Mapped[list] = mapped_column(JSON, nullable=False)
+    done_archives: Mapped[int] = mapped_column(SmallInteger, nullable=False, default=0)
+    tracks: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    files: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    error: Mapped[str] = mapped_column(String, nullable=True)
+    attempts: Mapped[int] = mapped_column(SmallInteger, nullable=False, default=0)
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    locked_by: Mapped[str] = mapped_column(String, nullable=True)
+    heartbeat_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    finished_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class LibraryStatsDbEntity(Base):
+    """
+    Статистика библиотеки пользователя. Обновляется при загрузке и удалении файлов,
+    чтобы не считать ее по таблице файлов при каждом запросе
+
+    Attributes
+    ----------
+    owner_id
+        id пользователя
+    tracks
+        количество треков
+    total_bytes
+        суммарный размер треков в байтах
+    albums
+        количество уникальных альбомов
+    artists
+        количество уникальных артистов
+    genres
+        количество уникальных жанров
+    """
+
+    __tablename__ = "library_stats"
+
+    owner_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    tracks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    albums: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    artists: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    genres: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class LibraryFacetDbEntity(Base):
+    """
+    Количество треков пользователя с конкретным альбомом, артистом или жанром.
+    По этим счетчикам поддерживается количество уникальных значений в LibraryStatsDbEntity
+
+    Attributes
+    ----------
+    owner_id
+        id пользователя
+    kind
+        вид значения: album, artist или genre
+    value
+        значение
+    tracks
+        количество треков с этим значением
+    """
+
+    __tablename__ = "library_facets"
+
+    owner_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    kind: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[str] = mapped_column(String, primary_key=True)
+    tracks: Mapped[int] = mapped_column(Integer, nullable=False)
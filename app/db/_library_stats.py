@@ -0,0 +1,142 @@
+from collections import Counter
+from typing import Iterable, List
+
+from sqlalchemy import Delete, Insert, Select, Update, delete, func, literal, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from ._entities import AudioFileDbEntity, LibraryFacetDbEntity, LibraryStatsDbEntity
+
+# Поля файла, по которым считаются уникальные значения, и соответствующие счетчики статистики
+FACETS = {
+    "album": "albums",
+    "artist": "artists",
+    "genre": "genres",
+}
+
+
+def facet_counts(files: Iterable) -> Counter:
+    """
+    Количество треков по каждому значению (вид, значение). Пустые значения не учитываются
+    """
+    counts = Counter()
+    for file in files:
+        for kind in FACETS:
+            value = getattr(file, kind)
+            if value:
+                counts[(kind, value)] += 1
+    return counts
+
+
+def stats_exists(owner_id: str) -> Select:
+    """
+    Есть ли у пользователя строка статистики
+    """
+    return select(LibraryStatsDbEntity.owner_id).where(LibraryStatsDbEntity.owner_id == owner_id)
+
+
+def backfill(owner_id: str) -> List[Insert]:
+    """
+    Заполнение статистики по уже загруженным файлам. Нужно один раз для пользователей,
+    файлы которых загружены до появления статистики. Выполнять, если stats_exists ничего не вернул
+    """
+    statements = []
+    for kind in FACETS:
+        column = getattr(AudioFileDbEntity, kind)
+        values = (
+            select(literal(owner_id), literal(kind), column, func.count())
+            .where(AudioFileDbEntity.owner_id == owner_id, column.is_not(None), column != "")
+            .group_by(column)
+        )
+        statements.append(
+            insert(LibraryFacetDbEntity)
+            .from_select(["owner_id", "kind", "value", "tracks"], values)
+            .on_conflict_do_nothing()
+        )
+
+    facets_count = {
+        counter: (
+            select(func.count())
+            .where(LibraryFacetDbEntity.owner_id == owner_id, LibraryFacetDbEntity.kind == kind)
+            .scalar_subquery()
+        )
+        for kind, counter in FACETS.items()
+    }
+    stats = select(
+        literal(owner_id),
+        func.count(AudioFileDbEntity.id),
+        func.coalesce(func.sum(AudioFileDbEntity.size_bytes), 0),
+        *facets_count.values(),
+    ).where(AudioFileDbEntity.owner_id == owner_id)
+    statements.append(
+        insert(LibraryStatsDbEntity)
+        .from_select(["owner_id", "tracks", "total_bytes", *facets_count.keys()], stats)
+        .on_conflict_do_nothing()
+    )
+    return statements
+
+
+def add_facets(owner_id: str, counts: Counter) -> Insert:
+    """
+    Увеличение счетчиков треков по значениям. Возвращает вид каждого значения и признак
+    того, что значение появилось впервые (inserted)
+    """
+    statement = insert(LibraryFacetDbEntity).values(
+        [
+            {"owner_id": owner_id, "kind": kind, "value": value, "tracks": tracks}
+            for (kind, value), tracks in counts.items()
+        ]
+    )
+    return statement.on_conflict_do_update(
+        index_elements=["owner_id", "kind", "value"],
+        set_={"tracks": LibraryFacetDbEntity.tracks + statement.excluded.tracks},
+    ).returning(LibraryFacetDbEntity.kind, literal_column("xmax = 0").label("inserted"))
+
+
+def remove_facets(owner_id: str, counts: Counter) -> List[Update | Delete]:
+    """
+    Уменьшение счетчиков треков по значениям и удаление значений, у которых не осталось треков.
+    Последняя инструкция возвращает вид каждого удаленного значения
+    """
+    statements = [
+        update(LibraryFacetDbEntity)
+        .where(
+            LibraryFacetDbEntity.owner_id == owner_id,
+            LibraryFacetDbEntity.kind == kind,
+            LibraryFacetDbEntity.value == value,
+        )
+        .values(tracks=LibraryFacetDbEntity.tracks - tracks)
+        for (kind, value), tracks in counts.items()
+    ]
+    statements.append(
+        delete(LibraryFacetDbEntity)
+        .where(LibraryFacetDbEntity.owner_id == owner_id, LibraryFacetDbEntity.tracks <= 0)
+        .returning(LibraryFacetDbEntity.kind)
+    )
+    return statements
+
+
+def update_stats(owner_id: str, tracks: int, total_bytes: int, facets: Counter) -> Update:
+    """
+    Изменение статистики пользователя на переданные значения
+
+    Parameters
+    ----------
+    tracks
+        изменение количества треков
+    total_bytes
+        изменение суммарного размера треков
+    facets
+        изменение количества уникальных значений по видам
+    """
+    return (
+        update(LibraryStatsDbEntity)
+        .where(LibraryStatsDbEntity.owner_id == owner_id)
+        .values(
+            tracks=LibraryStatsDbEntity.tracks + tracks,
+            total_bytes=LibraryStatsDbEntity.total_bytes + total_bytes,
+            **{
+                counter: getattr(LibraryStatsDbEntity, counter) + facets.get(kind, 0)
+                for kind, counter in FACETS.items()
+            },
+        )
+    )
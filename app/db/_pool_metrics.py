@@ -0,0 +1,54 @@
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+
+class PoolMetrics:
+    """
+    Счетчики пула соединений, собираемые через события SQLAlchemy
+
+    Parameters
+    ----------
+    pool
+        пул, за которым наблюдаем. Для асинхронного движка - engine.sync_engine.pool
+    """
+
+    def __init__(self, pool: Pool):
+        self.__pool = pool
+        self.__lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+
+        event.listen(pool, "connect", self.__on_connect)
+        event.listen(pool, "checkout", self.__on_checkout)
+        event.listen(pool, "checkin", self.__on_checkin)
+
+    def stats(self) -> dict[str, int]:
+        with self.__lock:
+            return {
+                "size": self.__pool.size() if hasattr(self.__pool, "size") else 0,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "checkouts_total": self.checkouts,
+                "checkins_total": self.checkins,
+                "connects_total": self.connects,
+            }
+
+    def __on_connect(self, *_):
+        with self.__lock:
+            self.connects += 1
+
+    def __on_checkout(self, *_):
+        with self.__lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def __on_checkin(self, *_):
+        with self.__lock:
+            self.checkins += 1
+            self.checked_out -= 1
@@ -0,0 +1,30 @@
+from sqlalchemy import Select, func, literal, or_
+
+from ._entities import AudioFileDbEntity
+
+
+def search_files(smth: Select, search: str) -> Select:
+    """
+    Фильтрация и ранжирование файлов по поисковой строке
+
+    Ищет по названию, артисту, альбому, жанру и пути (AudioFileDbEntity.search_text).
+    Подходят файлы, в которых строка встречается целиком, или похожие на нее с точностью
+    до опечаток (word_similarity из pg_trgm). Оба условия используют триграммный индекс.
+    Сначала идут самые похожие файлы
+    """
+    term = search.strip().lower()
+    if not term:
+        return smth
+
+    pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    query = literal(term)
+    return smth.where(
+        or_(
+            AudioFileDbEntity.search_text.like(pattern, escape="\\"),
+            # term <% search_text: есть слово, похожее на term не меньше pg_trgm.word_similarity_threshold
+            query.op("<%")(AudioFileDbEntity.search_text),
+        )
+    ).order_by(
+        func.word_similarity(query, AudioFileDbEntity.search_text).desc(),
+        AudioFileDbEntity.id,
+    )
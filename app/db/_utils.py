@@ -1,8 +1,10 @@
 from passlib.hash import argon2
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 
-from ..core.config import DATABASE_URL
+from ..core import config
+from ._pool_metrics import PoolMetrics
 
 
 def get_string_hash(string):
@@ -10,8 +12,25 @@ def get_string_hash(string):
     return argon2.hash(string)
 
 
+__pool_options = dict(
+    pool_size=config.DB_POOL_SIZE,
+    max_overflow=config.DB_MAX_OVERFLOW,
+    pool_timeout=config.DB_POOL_TIMEOUT,
+    pool_recycle=config.DB_POOL_RECYCLE,
+    pool_pre_ping=config.DB_POOL_PRE_PING,
+)
+
 # Создаем "движок" для подключения к БД
-_engine = create_engine(DATABASE_URL)
+_engine = create_engine(config.DATABASE_URL, **__pool_options)
+
+# Асинхронный "движок" (asyncpg) для запросов из event loop
+_async_engine = create_async_engine(config.ASYNC_DATABASE_URL, **__pool_options)
+
+# Метрики пулов соединений
+pool_metrics = {
+    "sync": PoolMetrics(_engine.pool),
+    "async": PoolMetrics(_async_engine.sync_engine.pool),
+}
 
 # Базовый класс для всех наших моделей SQLAlchemy
 Base = declarative_base()
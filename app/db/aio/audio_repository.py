@@ -0,0 +1,229 @@
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from ...core.models.file_dto import AlbumTrackDto, CoverInDto, FacetDto, FileCreateDto
+from ...core.models.library_stats_dto import LibraryStatsDto
+from .. import _library_stats as library_stats
+from .._entities import AudioFileDbEntity, CoverFileDbEntity, LibraryStatsDbEntity
+from .._search import search_files
+from ..pagination import order_files, paginate_files, split_page
+from .session import get_session
+
+
+async def get_all_files() -> List[AudioFileDbEntity]:
+    """
+    Получение всех файлов (только для отладки)
+    """
+    smth = select(AudioFileDbEntity)
+    async with get_session() as session:
+        return (await session.scalars(smth)).all()
+
+
+async def get_file(file_id: str) -> AudioFileDbEntity | None:
+    """
+    Получение метаданных файла из БД.
+    Повторный вызов в рамках запроса берет файл из identity map сессии без запроса в БД
+    """
+    async with get_session() as session:
+        return await session.get(AudioFileDbEntity, file_id)
+
+
+async def get_cover(cover_id: str) -> CoverFileDbEntity | None:
+    """
+    Получение метаданных обложки из БД
+    """
+    async with get_session() as session:
+        return await session.get(CoverFileDbEntity, cover_id)
+
+
+async def get_files_by_owner(
+        owner_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        search: str = None,
+) -> List[AudioFileDbEntity]:
+    """
+    Получение метаданных всех файлов, принадлежащих пользователю.
+    С search возвращаются только подходящие файлы, отсортированные по релевантности
+    """
+    smth = select(AudioFileDbEntity).where(AudioFileDbEntity.owner_id == owner_id)
+    smth = search_files(smth, search) if search else order_files(smth)
+    async with get_session() as session:
+        return (await session.scalars(smth.offset(skip).limit(limit))).all()
+
+
+async def get_files_page(
+        owner_id: str,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+) -> Tuple[List[AudioFileDbEntity], Optional[str]]:
+    """
+    Страница файлов пользователя, начиная с курсора (сначала новые)
+
+    Returns
+    -------
+    файлы страницы и курсор следующей страницы (None, если страница последняя)
+
+    Raises
+    ------
+    InvalidCursor
+        если курсор нельзя разобрать
+    """
+    smth = paginate_files(select(AudioFileDbEntity).where(AudioFileDbEntity.owner_id == owner_id), limit, cursor)
+    async with get_session() as session:
+        files = (await session.scalars(smth)).all()
+    return split_page(list(files), limit)
+
+
+async def create_audio_file(file: FileCreateDto, owner_id: str):
+    """
+    Создание метаданных нового аудио файла в БД
+    """
+    db_file = AudioFileDbEntity(**file.model_dump(), owner_id=owner_id)
+    async with get_session() as session:
+        await __ensure_library_stats(session, owner_id)
+        session.add(db_file)
+        await __add_to_library_stats(session, owner_id, [file])
+        await session.commit()
+        await session.refresh(db_file)
+    return db_file
+
+
+async def create_cover_file(file: CoverInDto):
+    """
+    Создание метаданных нового файла обложки в БД
+    """
+    db_file = CoverFileDbEntity(**file.model_dump())
+    async with get_session() as session:
+        session.add(db_file)
+        await session.commit()
+        await session.refresh(db_file)
+    return db_file
+
+
+async def delete_file(file_id: str):
+    """
+    Удаление метаданных файла из БД. В той же транзакции обновляется статистика библиотеки
+    """
+    async with get_session() as session:
+        db_file = await session.get(AudioFileDbEntity, file_id)
+        if db_file:
+            await __ensure_library_stats(session, db_file.owner_id)
+            await session.delete(db_file)
+            await __remove_from_library_stats(session, db_file)
+            await session.commit()
+    return db_file
+
+
+async def get_library_stats(owner_id: str) -> LibraryStatsDto:
+    """
+    Статистика библиотеки пользователя: одна строка по первичному ключу.
+    Для файлов, загруженных до появления статистики, она заполняется при первом запросе
+    """
+    async with get_session() as session:
+        db_stats = await session.get(LibraryStatsDbEntity, owner_id)
+        if db_stats is None:
+            await __ensure_library_stats(session, owner_id)
+            await session.commit()
+            db_stats = await session.get(LibraryStatsDbEntity, owner_id)
+        return LibraryStatsDto.model_validate(db_stats)
+
+
+async def get_genres(owner_id: str, limit: int = 100, after: Optional[str] = None) -> List[FacetDto]:
+    """
+    Жанры пользователя с количеством треков, по алфавиту
+    """
+    return await __get_facets(AudioFileDbEntity.genre, owner_id=owner_id, limit=limit, after=after)
+
+
+async def get_albums(owner_id: str, limit: int = 100, after: Optional[str] = None) -> List[FacetDto]:
+    """
+    Альбомы пользователя с количеством треков и обложкой, по алфавиту
+    """
+    return await __get_facets(AudioFileDbEntity.album, owner_id=owner_id, limit=limit, after=after)
+
+
+async def get_artists(owner_id: str, limit: int = 100, after: Optional[str] = None) -> List[FacetDto]:
+    """
+    Артисты пользователя с количеством треков и обложкой, по алфавиту
+    """
+    return await __get_facets(AudioFileDbEntity.artist, owner_id=owner_id, limit=limit, after=after)
+
+
+async def get_album_tracks(owner_id: str, album: str) -> List[AlbumTrackDto]:
+    """
+    Треки альбома по порядку. Читаются из индекса (owner_id, album, track_number) без обращения к таблице
+    """
+    smth = (
+        select(
+            AudioFileDbEntity.id,
+            AudioFileDbEntity.track_title,
+            AudioFileDbEntity.track_number,
+            AudioFileDbEntity.duration,
+            AudioFileDbEntity.cover,
+        )
+        .where(AudioFileDbEntity.owner_id == owner_id, AudioFileDbEntity.album == album)
+        .order_by(AudioFileDbEntity.track_number, AudioFileDbEntity.id)
+    )
+    async with get_session() as session:
+        return [AlbumTrackDto.model_validate(row) for row in await session.execute(smth)]
+
+
+async def __ensure_library_stats(session, owner_id: str):
+    """
+    Заполнение статистики библиотеки по уже загруженным файлам, если ее еще нет.
+    Вызывается до изменения файлов в транзакции
+    """
+    if await session.scalar(library_stats.stats_exists(owner_id)) is None:
+        for statement in library_stats.backfill(owner_id):
+            await session.execute(statement)
+
+
+async def __add_to_library_stats(session, owner_id: str, files: List[FileCreateDto]):
+    counts = library_stats.facet_counts(files)
+    new_facets = Counter()
+    if counts:
+        for kind, inserted in await session.execute(library_stats.add_facets(owner_id, counts)):
+            if inserted:
+                new_facets[kind] += 1
+    await session.execute(
+        library_stats.update_stats(
+            owner_id,
+            tracks=len(files),
+            total_bytes=sum(file.size_bytes for file in files),
+            facets=new_facets,
+        )
+    )
+
+
+async def __remove_from_library_stats(session, db_file: AudioFileDbEntity):
+    *updates, remove = library_stats.remove_facets(db_file.owner_id, library_stats.facet_counts([db_file]))
+    for statement in updates:
+        await session.execute(statement)
+    removed_facets = Counter()
+    for (kind,) in await session.execute(remove):
+        removed_facets[kind] -= 1
+    await session.execute(
+        library_stats.update_stats(db_file.owner_id, tracks=-1, total_bytes=-db_file.size_bytes, facets=removed_facets)
+    )
+
+
+async def __get_facets(column, owner_id: str, limit: int, after: Optional[str]) -> List[FacetDto]:
+    """
+    Группировка треков пользователя по колонке. Использует индекс (owner_id, колонка).
+    Страницы задаются названием последней группы предыдущей страницы (after)
+    """
+    smth = (
+        select(column, func.count(), func.min(AudioFileDbEntity.cover))
+        .where(AudioFileDbEntity.owner_id == owner_id, column.is_not(None), column != "")
+        .group_by(column)
+        .order_by(column)
+        .limit(limit)
+    )
+    if after is not None:
+        smth = smth.where(column > after)
+    async with get_session() as session:
+        rows = await session.execute(smth)
+        return [FacetDto(name=name, tracks=tracks, cover=cover) for name, tracks, cover in rows]
@@ -0,0 +1,42 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .._utils import _async_engine
+
+# Фабрика для создания асинхронных сессий с БД.
+# expire_on_commit=False: после commit объекты остаются доступными без повторного запроса
+__AsyncSessionLocal = async_sessionmaker(bind=_async_engine, autoflush=False, expire_on_commit=False)
+
+# Сессия текущего запроса. Устанавливается зависимостью request_session
+__request_session: ContextVar[Optional[AsyncSession]] = ContextVar("request_session", default=None)
+
+
+async def request_session() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency для FastAPI: одна сессия (и одно соединение из пула) на весь запрос.
+    Все вызовы репозиториев внутри запроса, включая авторизацию, используют эту сессию
+    """
+    async with __AsyncSessionLocal() as session:
+        __request_session.set(session)
+        try:
+            yield session
+        finally:
+            __request_session.set(None)
+
+
+@asynccontextmanager
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """
+    Сессия для вызова репозитория. Внутри запроса возвращает сессию запроса и не закрывает ее,
+    вне запроса (фоновые задачи, скрипты) открывает новую сессию
+    """
+    session = __request_session.get()
+    if session is not None:
+        yield session
+        return
+
+    async with __AsyncSessionLocal() as session:
+        yield session
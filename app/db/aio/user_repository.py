@@ -0,0 +1,111 @@
+import asyncio
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from ...core import config
+from ...core.models.user_dto import UserBaseDto, UserCreateDto
+from ...core.ttl_cache import TtlCache
+from .._entities import UserDbEntity
+from .._utils import get_string_hash
+from .session import get_session
+
+# Пользователи по id. Используется при проверке токена на каждом запросе
+__user_cache: TtlCache[UserBaseDto] = TtlCache(maxsize=config.USER_CACHE_SIZE)
+
+
+async def get_user(user_id: str) -> UserDbEntity:
+    """
+    Получение пользователя из БД
+    """
+    smth = select(UserDbEntity).where(UserDbEntity.id == user_id)
+    async with get_session() as session:
+        return await session.scalar(smth)
+
+
+async def delete_user(user_id: str):
+    """
+    Удаление пользователя из БД
+    """
+    smth = select(UserDbEntity).options(selectinload(UserDbEntity.files)).where(UserDbEntity.id == user_id)
+
+    async with get_session() as session:
+        db_user = await session.scalar(smth)
+
+        if not db_user:
+            return None
+
+        await session.delete(db_user)
+        await session.commit()
+        __user_cache.pop(user_id)
+
+        return db_user
+
+
+async def get_user_by_username(username: str) -> Optional[UserBaseDto]:
+    """
+    Получение информации о пользователе по его имени
+    """
+    smth = select(UserDbEntity).where(UserDbEntity.username == username)
+    async with get_session() as session:
+        found = await session.scalar(smth)
+        if found:
+            return UserBaseDto(
+                id=found.id,
+                username=found.username,
+                hashed_password=found.hashed_password,
+            )
+        return None
+
+
+async def get_user_by_id(user_id: str) -> Optional[UserBaseDto]:
+    """
+    Получение информации о пользователе по его id.
+    Найденные пользователи кэшируются на USER_CACHE_TTL_SECONDS
+    """
+    cached = __user_cache.get(user_id)
+    if cached:
+        return cached
+
+    smth = select(UserDbEntity).where(UserDbEntity.id == user_id)
+    async with get_session() as session:
+        found = await session.scalar(smth)
+        if found:
+            user = UserBaseDto(
+                id=found.id,
+                username=found.username,
+                hashed_password=None,
+            )
+            __user_cache.set(user_id, user, ttl=config.USER_CACHE_TTL_SECONDS)
+            return user
+        return None
+
+
+def get_user_cache_stats() -> dict[str, int]:
+    """
+    Размер кэша пользователей и количество попаданий и промахов
+    """
+    return __user_cache.stats()
+
+
+async def create_user(user: UserCreateDto) -> UserBaseDto:
+    """
+    Создание нового пользователя.
+    Хэширование пароля (argon2) нагружает CPU, поэтому выполняется в пуле потоков
+    """
+    hashed_password = await asyncio.to_thread(get_string_hash, user.password)
+    db_user = UserDbEntity(username=user.username, hashed_password=hashed_password)
+    async with get_session() as session:
+        session.add(db_user)
+        await session.commit()
+        return UserBaseDto.model_validate(db_user)
+
+
+async def get_all_users() -> List[UserBaseDto]:
+    """
+    Получение всех пользователей (использовать только для отладки)
+    """
+    smth = select(UserDbEntity)
+    async with get_session() as session:
+        return [UserBaseDto.model_validate(db_entity) for db_entity in (await session.scalars(smth)).all()]
@@ -1,10 +1,14 @@
-from typing import List
+from collections import Counter
+from typing import List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import Update, insert, select
 
 from ..core.models.file_dto import CoverInDto, FileCreateDto
+from . import _library_stats as library_stats
 from ._database import get_db
 from ._entities import AudioFileDbEntity, CoverFileDbEntity
+from ._search import search_files
+from .pagination import order_files
 
 
 def get_all_files() -> List[AudioFileDbEntity]:
@@ -27,27 +31,15 @@ def get_file(file_id: str) -> AudioFileDbEntity | None:
 
 def get_files_by_owner(owner_id: str, skip: int = 0, limit: int = 100, search: str = None) -> List[AudioFileDbEntity]:
     """
-    Получение метаданных всех файлов, принадлежащих пользователю
+    Получение метаданных всех файлов, принадлежащих пользователю.
+    С search возвращаются только подходящие файлы, отсортированные по релевантности
     """
     smth = select(AudioFileDbEntity).where(AudioFileDbEntity.owner_id == owner_id)
-    if search:
-        smth = smth.where(AudioFileDbEntity.original_name.ilike(f"%{search}%"))
+    smth = search_files(smth, search) if search else order_files(smth)
     with next(get_db()) as session:
         return session.scalars(smth.offset(skip).limit(limit)).all()
 
 
-def create_audio_file(file: FileCreateDto, owner_id: str):
-    """
-    Создание метаданных нового аудио файла в БД
-    """
-
-    db_file = AudioFileDbEntity(**file.model_dump(), owner_id=owner_id)
-    with next(get_db()) as session:
-        session.add(db_file)
-        session.commit()
-        session.refresh(db_file)
-    return db_file
-
 def create_cover_file(file: CoverInDto):
     """
     Создание метаданных нового файла обложки в БД
@@ -61,82 +53,68 @@ def create_cover_file(file: CoverInDto):
     return db_file
 
 
-def delete_file(file_id: str):
+def create_files_bulk(
+        covers: List[CoverInDto],
+        files: List[FileCreateDto],
+        owner_id: str,
+        checkpoint: Optional[Update] = None,
+) -> bool:
     """
-    Удаление метаданных файла из БД
+    Создание метаданных обложек и аудиофайлов целого архива одной транзакцией.
+    Строки вставляются пачками (executemany), без перечитывания после commit.
+    В той же транзакции обновляется статистика библиотеки
+
+    Parameters
+    ----------
+    checkpoint
+        запрос, который выполняется в той же транзакции (например, сохранение прогресса задачи загрузки).
+        Если он не изменил ни одной строки, транзакция откатывается
+
+    Returns
+    -------
+    False, если checkpoint не изменил ни одной строки и метаданные не сохранены
     """
-    db_file = get_file(file_id)
-    if db_file:
-        with next(get_db()) as session:
-            session.delete(db_file)
-            session.commit()
-    return db_file
-
-def get_feature_awailability(owner_id: str) -> dict[str, bool]:
-    albums_query = select(AudioFileDbEntity.album).where(AudioFileDbEntity.owner_id == owner_id)
-    artists_query = select(AudioFileDbEntity.artist).where(AudioFileDbEntity.owner_id == owner_id)
-    genres_query = select(AudioFileDbEntity.genre).where(AudioFileDbEntity.owner_id == owner_id)
-
-    tracks_exists = False
-    genres_exists = False
-    albums_exists = False
-    artists_exists = False
-
-    def __get_res():
-        return {
-            "tracks": tracks_exists,
-            "genres": genres_exists,
-            "albums": albums_exists,
-            "artists": artists_exists,
-        }
-
     with next(get_db()) as session:
-        is_at_least_one_track_exists = (
-            True
-            if session.query(AudioFileDbEntity)
-            .where(AudioFileDbEntity.owner_id == owner_id)
-            .first()
-            else False
-        )
-        if not is_at_least_one_track_exists:
-            return __get_res()
-        else:
-            tracks_exists = True
- 
-        genres = [
-            genre for genre in session.scalars(genres_query).unique()
-            if genre
-        ]
-        if len(genres) > 0:
-            genres_exists = True
-
-        albums = [
-            genre for genre in session.scalars(albums_query).unique()
-            if genre
-        ]
-        if len(albums) > 0:
-            albums_exists = True
-
-        artists = [
-            genre for genre in session.scalars(artists_query).unique()
-            if genre
-        ]
-        if len(artists) > 0:
-            artists_exists = True
-
-        return __get_res()
-
-def get_genres(owner_id: str) -> List[str]:
-    smth = select(AudioFileDbEntity.genre).where(AudioFileDbEntity.owner_id == owner_id)
-    with next(get_db()) as session:
-        return [genre for genre in session.scalars(smth).unique() if genre]
+        # checkpoint выполняется первым: строка остается заблокированной до конца транзакции
+        if checkpoint is not None and session.execute(checkpoint).rowcount == 0:
+            session.rollback()
+            return False
+        __ensure_library_stats(session, owner_id)
+        # Обложки вставляются первыми: на них ссылаются треки
+        if covers:
+            session.execute(insert(CoverFileDbEntity), [cover.model_dump() for cover in covers])
+        if files:
+            session.execute(
+                insert(AudioFileDbEntity),
+                [{**file.model_dump(), "owner_id": owner_id} for file in files],
+            )
+            __add_to_library_stats(session, owner_id, files)
+        session.commit()
+        return True
 
-def get_albums(owner_id: str) -> List[str]:
-    smth = select(AudioFileDbEntity.album).where(AudioFileDbEntity.owner_id == owner_id)
-    with next(get_db()) as session:
-        return session.scalars(smth).unique()
 
-def get_artists(owner_id: str) -> List[str]:
-    smth = select(AudioFileDbEntity.artist).where(AudioFileDbEntity.owner_id == owner_id)
-    with next(get_db()) as session:
-        return session.scalars(smth).unique()
+def __ensure_library_stats(session, owner_id: str):
+    """
+    Заполнение статистики библиотеки по уже загруженным файлам, если ее еще нет.
+    Вызывается до изменения файлов в транзакции
+    """
+    if session.scalar(library_stats.stats_exists(owner_id)) is None:
+        for statement in library_stats.backfill(owner_id):
+            session.execute(statement)
+
+
+def __add_to_library_stats(session, owner_id: str, files: List[FileCreateDto]):
+    counts = library_stats.facet_counts(files)
+    new_facets = Counter()
+    if counts:
+        for kind, inserted in session.execute(library_stats.add_facets(owner_id, counts)):
+            if inserted:
+                new_facets[kind] += 1
+    session.execute(
+        library_stats.update_stats(
+            owner_id,
+            tracks=len(files),
+            total_bytes=sum(file.size_bytes for file in files),
+            facets=new_facets,
+        )
+    )
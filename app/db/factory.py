@@ -1,4 +1,12 @@
-from ._utils import Base, _engine
+from sqlalchemy import Connection, text
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from ._entities import AudioFileDbEntity
+from ._utils import Base, _engine, pool_metrics
+
+# Колонки, добавленные в files после первой версии схемы. create_all не изменяет существующие таблицы,
+# поэтому в старых БД их нужно добавить отдельно
+__files_added_columns = ("etag", "duration", "search_text")
 
 
 def init_database():
@@ -6,4 +14,30 @@ def init_database():
     Создаем таблицы в БД на основе моделей SQLAlchemy
     В реальном продакшене для миграций лучше использовать Alembic
     """
+    with _engine.begin() as connection:
+        # Триграммы для поиска по библиотеке
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
     Base.metadata.create_all(bind=_engine)
+    with _engine.begin() as connection:
+        __upgrade_files_table(connection)
+
+
+def get_pool_stats() -> dict[str, dict[str, int]]:
+    """
+    Метрики пулов соединений синхронного и асинхронного движков
+    """
+    return {name: metrics.stats() for name, metrics in pool_metrics.items()}
+
+
+def __upgrade_files_table(connection: Connection):
+    """
+    Добавление новых колонок и индексов в таблицу files, созданную до их появления.
+    Для новой БД ничего не меняет. search_text вычисляется для всех существующих строк,
+    поэтому на большой таблице первый запуск может занять время
+    """
+    table = AudioFileDbEntity.__table__
+    for name in __files_added_columns:
+        column = CreateColumn(table.c[name]).compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {column}"))
+    for index in table.indexes:
+        connection.execute(CreateIndex(index, if_not_exists=True))
@@ -0,0 +1,248 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Update, and_, delete, select, update
+from sqlalchemy.sql import func
+
+from ..core.models.file_dto import FileDto
+from ..core.models.upload_job_dto import TrackProgressDto, UploadJobDto, UploadJobStatus
+from ._database import get_db
+from ._entities import UploadJobDbEntity
+
+
+def create_job(job_id: str, owner_id: str, archives: List[dict], custom_dir: Optional[str] = None) -> UploadJobDto:
+    """
+    Постановка задачи загрузки в очередь
+
+    Parameters
+    ----------
+    archives
+        архивы задачи: список {"name": имя архива, "object_name": имя архива в MinIO}
+    """
+    db_job = UploadJobDbEntity(
+        id=job_id,
+        owner_id=owner_id,
+        status=UploadJobStatus.QUEUED.value,
+        custom_dir=custom_dir,
+        archives=archives,
+        done_archives=0,
+        tracks={},
+        files=[],
+        attempts=0,
+    )
+    with next(get_db()) as session:
+        session.add(db_job)
+        session.commit()
+        return to_dto(db_job)
+
+
+def get_job(job_id: str) -> Optional[UploadJobDbEntity]:
+    """
+    Получение задачи загрузки
+    """
+    smth = select(UploadJobDbEntity).where(UploadJobDbEntity.id == job_id)
+    with next(get_db()) as session:
+        return session.scalar(smth)
+
+
+def release_stale_jobs(lease_seconds: int, max_attempts: int, retry_base_seconds: int) -> List[Tuple[str, List[dict]]]:
+    """
+    Освобождение задач, воркер которых не присылал heartbeat дольше lease_seconds (воркер упал или был убит).
+
+    Такая попытка считается неудачной: если попытки не закончились, задача возвращается в очередь
+    с той же экспоненциальной задержкой, что и после ошибки, иначе завершается с ошибкой.
+    Иначе задача, которая роняет воркер (OOM, segfault), захватывалась бы бесконечно
+
+    Returns
+    -------
+    пары (id задачи, архивы) задач, завершенных с ошибкой (их загруженные архивы нужно удалить).
+    Возвращаются значения, а не сущности: после commit сущности сессии устаревают
+    """
+    is_stale = and_(
+        UploadJobDbEntity.status == UploadJobStatus.RUNNING.value,
+        UploadJobDbEntity.heartbeat_at < func.now() - timedelta(seconds=lease_seconds),
+    )
+    error = "Upload worker stopped responding"
+    retry_smth = (
+        update(UploadJobDbEntity)
+        .where(is_stale, UploadJobDbEntity.attempts < max_attempts)
+        .values(
+            status=UploadJobStatus.QUEUED.value,
+            error=error,
+            run_after=func.now()
+            + timedelta(seconds=retry_base_seconds) * func.power(2, UploadJobDbEntity.attempts - 1),
+            locked_by=None,
+            heartbeat_at=None,
+        )
+    )
+    fail_smth = (
+        update(UploadJobDbEntity)
+        .where(is_stale, UploadJobDbEntity.attempts >= max_attempts)
+        .values(status=UploadJobStatus.FAILED.value, error=error, finished_at=func.now(), locked_by=None)
+        .returning(UploadJobDbEntity.id, UploadJobDbEntity.archives)
+    )
+    with next(get_db()) as session:
+        session.execute(retry_smth)
+        failed = [(job_id, archives) for job_id, archives in session.execute(fail_smth)]
+        session.commit()
+        return failed
+
+
+def claim_job(worker_id: str) -> Optional[UploadJobDbEntity]:
+    """
+    Захват следующей задачи воркером.
+
+    Захватываются задачи в очереди, у которых прошла задержка перед повтором. Задачи упавших воркеров
+    попадают в очередь через release_stale_jobs.
+    Строка блокируется через FOR UPDATE SKIP LOCKED, поэтому параллельные воркеры не получат одну и ту же задачу
+    """
+    now = func.now()
+    smth = (
+        select(UploadJobDbEntity)
+        .where(
+            UploadJobDbEntity.status == UploadJobStatus.QUEUED.value,
+            UploadJobDbEntity.run_after <= now,
+        )
+        .order_by(UploadJobDbEntity.run_after)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    with next(get_db()) as session:
+        db_job = session.scalar(smth)
+        if db_job is None:
+            return None
+
+        db_job.status = UploadJobStatus.RUNNING.value
+        db_job.locked_by = worker_id
+        db_job.heartbeat_at = now
+        db_job.attempts += 1
+        session.commit()
+        session.refresh(db_job)
+        return db_job
+
+
+def save_progress(
+        job_id: str,
+        worker_id: str,
+        tracks: dict,
+        files: Optional[List[dict]] = None,
+        done_archives: Optional[int] = None,
+) -> bool:
+    """
+    Сохранение прогресса задачи и продление ее захвата воркером (см. progress_statement)
+
+    Returns
+    -------
+    False, если задача уже захвачена другим воркером
+    """
+    smth = progress_statement(
+        job_id=job_id,
+        worker_id=worker_id,
+        tracks=tracks,
+        files=files,
+        done_archives=done_archives,
+    )
+    with next(get_db()) as session:
+        result = session.execute(smth)
+        session.commit()
+        return result.rowcount > 0
+
+
+def progress_statement(
+        job_id: str,
+        worker_id: str,
+        tracks: dict,
+        files: Optional[List[dict]] = None,
+        done_archives: Optional[int] = None,
+) -> Update:
+    """
+    Запрос сохранения прогресса задачи. Не изменит ни одной строки, если задача захвачена другим воркером.
+    Позволяет сохранить прогресс в одной транзакции с результатами обработки архива
+
+    Parameters
+    ----------
+    files
+        метаданные загруженных треков. None - не изменять
+    done_archives
+        количество обработанных архивов. None - не изменять. Значение в БД никогда не уменьшается:
+        иначе при повторе задачи уже сохраненный архив был бы обработан снова, и его треки задублировались бы
+    """
+    values = dict(tracks=tracks, heartbeat_at=func.now())
+    if files is not None:
+        values["files"] = files
+    if done_archives is not None:
+        values["done_archives"] = func.greatest(UploadJobDbEntity.done_archives, done_archives)
+    return (
+        update(UploadJobDbEntity)
+        .where(UploadJobDbEntity.id == job_id, UploadJobDbEntity.locked_by == worker_id)
+        .values(**values)
+    )
+
+
+def complete_job(job_id: str, worker_id: str) -> bool:
+    """
+    Успешное завершение задачи
+    """
+    return __finish(job_id, worker_id, status=UploadJobStatus.DONE, error=None)
+
+
+def fail_job(job_id: str, worker_id: str, error: str, retry_at: Optional[datetime]) -> bool:
+    """
+    Неудачная попытка выполнения задачи
+
+    Parameters
+    ----------
+    retry_at
+        время следующей попытки. None - попытки закончились, задача завершается с ошибкой
+    """
+    if retry_at is None:
+        return __finish(job_id, worker_id, status=UploadJobStatus.FAILED, error=error)
+
+    smth = (
+        update(UploadJobDbEntity)
+        .where(UploadJobDbEntity.id == job_id, UploadJobDbEntity.locked_by == worker_id)
+        .values(
+            status=UploadJobStatus.QUEUED.value,
+            error=error,
+            run_after=retry_at,
+            locked_by=None,
+            heartbeat_at=None,
+        )
+    )
+    with next(get_db()) as session:
+        result = session.execute(smth)
+        session.commit()
+        return result.rowcount > 0
+
+
+def remove_finished_jobs(older_than: timedelta) -> int:
+    """
+    Удаление задач, завершенных раньше, чем older_than назад
+    """
+    smth = delete(UploadJobDbEntity).where(UploadJobDbEntity.finished_at < func.now() - older_than)
+    with next(get_db()) as session:
+        result = session.execute(smth)
+        session.commit()
+        return result.rowcount
+
+
+def to_dto(db_job: UploadJobDbEntity) -> UploadJobDto:
+    return UploadJobDto(
+        id=db_job.id,
+        status=UploadJobStatus(db_job.status),
+        tracks=[TrackProgressDto(**track) for track in (db_job.tracks or {}).values()],
+        files=[FileDto(**file) for file in db_job.files or []],
+        error=db_job.error,
+    )
+
+
+def __finish(job_id: str, worker_id: str, status: UploadJobStatus, error: Optional[str]) -> bool:
+    smth = (
+        update(UploadJobDbEntity)
+        .where(UploadJobDbEntity.id == job_id, UploadJobDbEntity.locked_by == worker_id)
+        .values(status=status.value, error=error, finished_at=func.now(), locked_by=None)
+    )
+    with next(get_db()) as session:
+        result = session.execute(smth)
+        session.commit()
+        return result.rowcount > 0
@@ -0,0 +1,68 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Select, tuple_
+
+from ._entities import AudioFileDbEntity
+
+
+class InvalidCursor(ValueError):
+    """
+    Курсор поврежден или создан не этим сервером
+    """
+
+
+def encode_cursor(created_at: datetime, file_id: str) -> str:
+    """
+    Непрозрачный курсор, указывающий на файл, после которого начинается следующая страница
+    """
+    raw = json.dumps([created_at.isoformat(), file_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Разбор курсора, созданного encode_cursor
+
+    Raises
+    ------
+    InvalidCursor
+        если курсор нельзя разобрать
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, file_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(file_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+
+def order_files(smth: Select) -> Select:
+    """
+    Порядок файлов библиотеки: сначала новые. Совпадает с индексом (owner_id, created_at, id)
+    """
+    return smth.order_by(AudioFileDbEntity.created_at.desc(), AudioFileDbEntity.id.desc())
+
+
+def paginate_files(smth: Select, limit: int, cursor: Optional[str] = None) -> Select:
+    """
+    Страница файлов по курсору (keyset pagination). Стоимость запроса не зависит от номера страницы.
+    Выбирается limit + 1 файл, чтобы понять, есть ли следующая страница (см. split_page), limit не меньше 1
+    """
+    if cursor:
+        created_at, file_id = decode_cursor(cursor)
+        smth = smth.where(tuple_(AudioFileDbEntity.created_at, AudioFileDbEntity.id) < (created_at, file_id))
+    return order_files(smth).limit(limit + 1)
+
+
+def split_page(files: List[AudioFileDbEntity], limit: int) -> Tuple[List[AudioFileDbEntity], Optional[str]]:
+    """
+    Файлы страницы и курсор следующей страницы (None, если страница последняя)
+    """
+    if len(files) <= limit:
+        return files, None
+    last = files[limit - 1]
+    return files[:limit], encode_cursor(last.created_at, last.id)
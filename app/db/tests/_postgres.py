@@ -0,0 +1,98 @@
+import os
+import unittest
+from typing import Optional
+from unittest import mock
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.models.file_dto import FileCreateDto
+from app.db import _database
+from app.db._entities import UserDbEntity
+from app.db._utils import Base
+from app.db.aio import session as aio_session
+
+OWNER_ID = "user"
+
+# Отдельная БД для тестов репозиториев (postgresql://...). Схема пересоздается перед каждым тестом,
+# поэтому рабочую БД указывать нельзя. Без переменной тесты пропускаются
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def create_schema(url: str):
+    """
+    Пустая схема с одним пользователем OWNER_ID
+    """
+    engine = create_engine(url)
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as connection:
+            connection.execute(insert(UserDbEntity).values(id=OWNER_ID, username=OWNER_ID, hashed_password=""))
+    finally:
+        engine.dispose()
+
+
+def create_file(file_id: str, album: Optional[str] = "Album", cover: Optional[str] = None) -> FileCreateDto:
+    """
+    Метаданные загруженного трека пользователя OWNER_ID
+    """
+    return FileCreateDto(
+        id=file_id,
+        original_name=f"Album/{file_id}.mp3",
+        minio_object_name=f"{OWNER_ID}/{file_id}/original.mp3",
+        size_bytes=100,
+        mime_type="audio/mpeg",
+        track_title=file_id,
+        track_number=1,
+        album=album,
+        artist="Artist",
+        genre=None,
+        cover=cover,
+    )
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class PostgresTestCase(unittest.TestCase):
+    """
+    Тест синхронных репозиториев на чистой схеме. get_db выдает сессии тестовой БД
+    """
+
+    def setUp(self):
+        create_schema(TEST_DATABASE_URL)
+        engine = create_engine(TEST_DATABASE_URL)
+        self.addCleanup(engine.dispose)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        patcher = mock.patch.object(_database, "__SessionLocal", self.session_factory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class AsyncPostgresTestCase(unittest.IsolatedAsyncioTestCase):
+    """
+    Тест асинхронных репозиториев на чистой схеме. get_session и get_db выдают сессии тестовой БД:
+    данные можно готовить синхронными репозиториями (например, загрузкой архива)
+    """
+
+    async def asyncSetUp(self):
+        create_schema(TEST_DATABASE_URL)
+        engine = create_async_engine(make_url(TEST_DATABASE_URL).set(drivername="postgresql+asyncpg"))
+        self.addAsyncCleanup(engine.dispose)
+        self.session_factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+        sync_engine = create_engine(TEST_DATABASE_URL)
+        self.addCleanup(sync_engine.dispose)
+        self.sync_session_factory = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+        patchers = [
+            mock.patch.object(aio_session, "__AsyncSessionLocal", self.session_factory),
+            mock.patch.object(_database, "__SessionLocal", self.sync_session_factory),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
@@ -0,0 +1,60 @@
+from sqlalchemy import func, select
+
+from app.core.models.file_dto import CoverInDto
+from app.db import audio_repository, job_repository
+from app.db._entities import AudioFileDbEntity, CoverFileDbEntity, LibraryStatsDbEntity
+from app.db.tests._postgres import OWNER_ID, PostgresTestCase, create_file
+
+
+class TestCreateFilesBulk(PostgresTestCase):
+    def setUp(self):
+        super().setUp()
+        job_repository.create_job(job_id="job", owner_id=OWNER_ID, archives=[])
+        job_repository.claim_job(worker_id="worker")
+        self.covers = [CoverInDto(id="cover", minio_object_name=f"{OWNER_ID}/covers/cover.jpg")]
+        # Трек ссылается на обложку, поэтому обложки должны вставляться первыми
+        self.files = [create_file("track-1", cover="cover"), create_file("track-2")]
+
+    def count(self, entity) -> int:
+        with self.session_factory() as session:
+            return session.scalar(select(func.count()).select_from(entity))
+
+    def checkpoint(self, worker_id: str):
+        return job_repository.progress_statement(
+            job_id="job",
+            worker_id=worker_id,
+            tracks={},
+            files=[{"id": file.id} for file in self.files],
+            done_archives=1,
+        )
+
+    def test_saves_archive_with_checkpoint(self):
+        is_saved = audio_repository.create_files_bulk(
+            covers=self.covers,
+            files=self.files,
+            owner_id=OWNER_ID,
+            checkpoint=self.checkpoint(worker_id="worker"),
+        )
+
+        self.assertTrue(is_saved)
+        self.assertEqual(self.count(CoverFileDbEntity), 1)
+        self.assertEqual(audio_repository.get_file("track-1").cover, "cover")
+        self.assertEqual(self.count(AudioFileDbEntity), 2)
+        self.assertEqual(job_repository.get_job("job").done_archives, 1)
+        with self.session_factory() as session:
+            self.assertEqual(session.get(LibraryStatsDbEntity, OWNER_ID).tracks, 2)
+
+    def test_rejected_checkpoint_saves_nothing(self):
+        # Задачу захватил другой воркер: запрос checkpoint не изменит ни одной строки
+        is_saved = audio_repository.create_files_bulk(
+            covers=self.covers,
+            files=self.files,
+            owner_id=OWNER_ID,
+            checkpoint=self.checkpoint(worker_id="other"),
+        )
+
+        self.assertFalse(is_saved)
+        self.assertEqual(self.count(CoverFileDbEntity), 0)
+        self.assertEqual(self.count(AudioFileDbEntity), 0)
+        self.assertEqual(self.count(LibraryStatsDbEntity), 0)
+        self.assertEqual(job_repository.get_job("job").done_archives, 0)
@@ -0,0 +1,104 @@
+import unittest
+from datetime import timedelta
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects import postgresql
+
+from app.core.models.upload_job_dto import UploadJobStatus
+from app.db import job_repository
+from app.db._entities import UploadJobDbEntity
+from app.db.tests._postgres import OWNER_ID, PostgresTestCase
+
+
+class TestReleaseStaleJobs(PostgresTestCase):
+    def start_job(self, job_id: str, attempts: int, heartbeat_age: timedelta):
+        archives = [{"name": f"{job_id}.zip", "object_name": f"staging/{job_id}.zip"}]
+        job_repository.create_job(job_id=job_id, owner_id=OWNER_ID, archives=archives)
+        with self.session_factory() as session:
+            session.execute(
+                update(UploadJobDbEntity)
+                .where(UploadJobDbEntity.id == job_id)
+                .values(
+                    status=UploadJobStatus.RUNNING.value,
+                    locked_by="worker",
+                    attempts=attempts,
+                    heartbeat_at=func.now() - heartbeat_age,
+                )
+            )
+            session.commit()
+        return archives
+
+    def release(self):
+        return job_repository.release_stale_jobs(lease_seconds=60, max_attempts=3, retry_base_seconds=10)
+
+    def test_fails_job_without_attempts_left(self):
+        archives = self.start_job("stale", attempts=3, heartbeat_age=timedelta(minutes=5))
+
+        self.assertEqual(self.release(), [("stale", archives)])
+
+        db_job = job_repository.get_job("stale")
+        self.assertEqual(db_job.status, UploadJobStatus.FAILED.value)
+        self.assertIsNone(db_job.locked_by)
+        self.assertIsNotNone(db_job.finished_at)
+        self.assertEqual(self.release(), [])
+
+    def test_requeues_job_with_attempts_left(self):
+        self.start_job("stale", attempts=1, heartbeat_age=timedelta(minutes=5))
+
+        self.assertEqual(self.release(), [])
+
+        db_job = job_repository.get_job("stale")
+        self.assertEqual(db_job.status, UploadJobStatus.QUEUED.value)
+        self.assertIsNone(db_job.locked_by)
+        # Захватить задачу можно только после задержки перед повтором
+        self.assertIsNone(job_repository.claim_job(worker_id="other"))
+
+    def test_keeps_live_job(self):
+        self.start_job("live", attempts=3, heartbeat_age=timedelta(seconds=0))
+
+        self.assertEqual(self.release(), [])
+        self.assertEqual(job_repository.get_job("live").status, UploadJobStatus.RUNNING.value)
+
+
+class TestProgressStatement(unittest.TestCase):
+    def test_heartbeat_keeps_archives(self):
+        smth = job_repository.progress_statement(job_id="job", worker_id="worker", tracks={})
+        sql = str(smth.compile(dialect=postgresql.dialect()))
+
+        self.assertNotIn("done_archives", sql)
+        self.assertNotIn("files=", sql)
+
+    def test_done_archives_never_decrease(self):
+        smth = job_repository.progress_statement(
+            job_id="job", worker_id="worker", tracks={}, files=[], done_archives=1
+        )
+        sql = str(smth.compile(dialect=postgresql.dialect()))
+
+        self.assertIn("done_archives=greatest(upload_jobs.done_archives,", sql)
+
+
+class TestSaveProgress(PostgresTestCase):
+    def setUp(self):
+        super().setUp()
+        job_repository.create_job(job_id="job", owner_id=OWNER_ID, archives=[])
+        self.assertIsNotNone(job_repository.claim_job(worker_id="worker"))
+
+    def test_late_heartbeat_keeps_archives(self):
+        files = [{"id": "file"}]
+        job_repository.save_progress(job_id="job", worker_id="worker", tracks={}, files=files, done_archives=1)
+        # Heartbeat, записанный после checkpoint архива
+        job_repository.save_progress(job_id="job", worker_id="worker", tracks={"track": {}})
+
+        db_job = job_repository.get_job("job")
+        self.assertEqual(db_job.done_archives, 1)
+        self.assertEqual(db_job.files, files)
+        self.assertEqual(db_job.tracks, {"track": {}})
+
+    def test_done_archives_never_decrease(self):
+        job_repository.save_progress(job_id="job", worker_id="worker", tracks={}, files=[], done_archives=2)
+        job_repository.save_progress(job_id="job", worker_id="worker", tracks={}, files=[], done_archives=1)
+
+        self.assertEqual(job_repository.get_job("job").done_archives, 2)
+
+    def test_rejects_other_worker(self):
+        self.assertFalse(job_repository.save_progress(job_id="job", worker_id="other", tracks={}))
@@ -0,0 +1,74 @@
+import unittest
+from collections import Counter
+from types import SimpleNamespace
+
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql
+
+from app.db import _library_stats as library_stats
+from app.db import audio_repository
+from app.db._entities import LibraryFacetDbEntity, LibraryStatsDbEntity
+from app.db.aio import audio_repository as aio_audio_repository
+from app.db.tests._postgres import OWNER_ID, AsyncPostgresTestCase, create_file
+
+
+class TestLibraryStats(unittest.TestCase):
+    def test_facet_counts_skip_empty_values(self):
+        files = [
+            SimpleNamespace(album="Abbey Road", artist="The Beatles", genre=""),
+            SimpleNamespace(album="Abbey Road", artist=None, genre="Rock"),
+        ]
+
+        self.assertEqual(
+            library_stats.facet_counts(files),
+            Counter({("album", "Abbey Road"): 2, ("artist", "The Beatles"): 1, ("genre", "Rock"): 1}),
+        )
+
+    def test_add_facets_reports_new_values(self):
+        statement = library_stats.add_facets("user", Counter({("album", "Abbey Road"): 2}))
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        self.assertIn(
+            "ON CONFLICT (owner_id, kind, value) DO UPDATE SET tracks = (library_facets.tracks + excluded.tracks)", sql
+        )
+        self.assertIn("RETURNING library_facets.kind, xmax = 0 AS inserted", sql)
+
+
+class TestLibraryStatsMaintenance(AsyncPostgresTestCase):
+    async def counters(self):
+        stats = await aio_audio_repository.get_library_stats(OWNER_ID)
+        return stats.tracks, stats.albums, stats.artists, stats.total_bytes
+
+    async def test_shared_album_counted_once(self):
+        files = [create_file("track-1", album="Abbey Road"), create_file("track-2", album="Abbey Road")]
+        audio_repository.create_files_bulk(covers=[], files=files, owner_id=OWNER_ID)
+        self.assertEqual(await self.counters(), (2, 1, 1, 200))
+
+        await aio_audio_repository.delete_file("track-1")
+        self.assertEqual(await self.counters(), (1, 1, 1, 100))
+
+        await aio_audio_repository.delete_file("track-2")
+        self.assertEqual(await self.counters(), (0, 0, 0, 0))
+        self.assertEqual(await aio_audio_repository.get_albums(OWNER_ID), [])
+
+    async def test_backfill_matches_incremental(self):
+        files = [
+            create_file("track-1", album="Abbey Road"),
+            create_file("track-2", album="Abbey Road"),
+            create_file("track-3", album="Let It Be"),
+            create_file("track-4", album=None),
+        ]
+        audio_repository.create_files_bulk(covers=[], files=files, owner_id=OWNER_ID)
+        incremental = await self.counters()
+
+        # Файлы загружены до появления статистики: она заполняется при первом запросе
+        with self.sync_session_factory() as session:
+            session.execute(delete(LibraryFacetDbEntity))
+            session.execute(delete(LibraryStatsDbEntity))
+            session.commit()
+
+        self.assertEqual(await self.counters(), incremental)
+        self.assertEqual(incremental, (4, 2, 1, 400))
+
+        await aio_audio_repository.delete_file("track-3")
+        self.assertEqual(await self.counters(), (3, 1, 1, 300))
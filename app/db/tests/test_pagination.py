@@ -0,0 +1,40 @@
+import unittest
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db._entities import AudioFileDbEntity
+from app.db.pagination import InvalidCursor, decode_cursor, encode_cursor, paginate_files, split_page
+
+
+class TestPagination(unittest.TestCase):
+    def test_cursor_round_trip(self):
+        created_at = datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=UTC)
+        cursor = encode_cursor(created_at, "file-1")
+
+        self.assertEqual(decode_cursor(cursor), (created_at, "file-1"))
+
+    def test_invalid_cursor(self):
+        for cursor in ("%%%", "bm90LWpzb24", encode_cursor(datetime.now(UTC), "x")[:-3]):
+            with self.assertRaises(InvalidCursor):
+                decode_cursor(cursor)
+
+    def test_keyset_query(self):
+        cursor = encode_cursor(datetime(2025, 1, 1, tzinfo=UTC), "file-1")
+        statement = paginate_files(select(AudioFileDbEntity.id), limit=10, cursor=cursor)
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        self.assertIn("WHERE (files.created_at, files.id) < (", sql)
+        self.assertIn("ORDER BY files.created_at DESC, files.id DESC", sql)
+        self.assertNotIn("OFFSET", sql)
+
+    def test_split_page(self):
+        created_at = datetime(2025, 1, 1, tzinfo=UTC)
+        files = [SimpleNamespace(id=str(i), created_at=created_at) for i in range(3)]
+
+        page, cursor = split_page(files, limit=2)
+        self.assertEqual([file.id for file in page], ["0", "1"])
+        self.assertEqual(decode_cursor(cursor), (created_at, "1"))
+        self.assertEqual(split_page(files, limit=3), (files, None))
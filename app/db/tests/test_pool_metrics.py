@@ -0,0 +1,25 @@
+import unittest
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from app.db._pool_metrics import PoolMetrics
+
+
+class TestPoolMetrics(unittest.TestCase):
+    def test_checkout_counters(self):
+        engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=2)
+        metrics = PoolMetrics(engine.pool)
+
+        with engine.connect() as first:
+            with engine.connect() as second:
+                first.execute(text("select 1"))
+                second.execute(text("select 1"))
+                self.assertEqual(metrics.stats()["checked_out"], 2)
+
+        stats = metrics.stats()
+        self.assertEqual(stats["checked_out"], 0)
+        self.assertEqual(stats["max_checked_out"], 2)
+        self.assertEqual(stats["checkouts_total"], 2)
+        self.assertEqual(stats["checkins_total"], 2)
+        self.assertEqual(stats["connects_total"], 2)
@@ -0,0 +1,25 @@
+import unittest
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db._entities import AudioFileDbEntity
+from app.db._search import search_files
+
+
+def compile_query(smth) -> str:
+    return str(smth.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+class TestSearchFiles(unittest.TestCase):
+    def test_filters_and_ranks(self):
+        sql = compile_query(search_files(select(AudioFileDbEntity.id), "  Abbey_Road "))
+
+        self.assertIn("files.search_text LIKE '%%abbey\\\\_road%%'", sql)
+        self.assertIn("'abbey_road' <%% files.search_text", sql)
+        self.assertIn("ORDER BY word_similarity('abbey_road', files.search_text) DESC", sql)
+
+    def test_blank_search(self):
+        smth = select(AudioFileDbEntity.id)
+
+        self.assertIs(search_files(smth, "   "), smth)
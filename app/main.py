@@ -1,19 +1,46 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
 from starlette.templating import Jinja2Templates
 
 from .api.api_files import fileRouter, internalRouter
 from .api.api_user import authRouter
+from .core import config
+from .core.monitoring import loop_lag_monitor
 from .db.factory import init_database
+from .services.ingest.worker import start_workers
 
 init_database()
 
 templates = Jinja2Templates(directory="app/templates")
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Синхронные эндпоинты и зависимости выполняются в пуле потоков, а не в event loop
+    to_thread.current_default_thread_limiter().total_tokens = config.THREADPOOL_SIZE
+    lag_monitor_task = asyncio.create_task(loop_lag_monitor.run())
+
+    # Встроенные воркеры очереди загрузок (по умолчанию выключены). Они делят GIL с event loop
+    # и увеличивают его задержку, поэтому задачи обычно обрабатывают отдельные процессы app.worker
+    stop_event = threading.Event()
+    workers = start_workers(count=config.UPLOAD_JOB_WORKERS, stop_event=stop_event)
+    yield
+    lag_monitor_task.cancel()
+    stop_event.set()
+    for worker in workers:
+        worker.join()
+
+
 app = FastAPI(
     title="File Storage Service",
     description="A service to store and manage files with user authentication.",
     version="1.0.0",
     root_path="/api",
+    lifespan=lifespan,
 )
 
 # Подключаем роутеры с нашими эндпоинтами
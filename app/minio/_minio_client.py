@@ -13,6 +13,17 @@ minio_client = Minio(
     secure=config.MINIO_USE_HTTPS,
 )
 
+# Клиент для подписи ссылок, по которым клиенты скачивают файлы напрямую из MinIO.
+# Подпись зависит от хоста, поэтому используется публичный адрес. С заданным регионом
+# клиент подписывает ссылки локально, без запросов к MinIO
+public_minio_client = Minio(
+    config.MINIO_PUBLIC_ENDPOINT,
+    access_key=config.MINIO_ACCESS_KEY,
+    secret_key=config.MINIO_SECRET_KEY,
+    secure=config.MINIO_PUBLIC_USE_HTTPS,
+    region=config.MINIO_REGION,
+)
+
 # Создаем бакет, если он не существует
 try:
     found = minio_client.bucket_exists(config.MINIO_BUCKET)
@@ -21,10 +21,7 @@ class Chunk(BaseFileParams):
 
 class Full(BaseFileParams):
     """
-    Сохранение объекта целиком
+    Получение объекта целиком
     """
 
-    def __init__(self, file_length):
-        self.file_length = file_length
-
-    file_length: int
+    pass
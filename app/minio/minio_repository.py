@@ -1,24 +1,35 @@
 import logging
+import os
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from io import BytesIO
-from typing import Optional
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
 
 from fastapi import HTTPException
 from minio import S3Error
 from minio.deleteobjects import DeleteObject
+from minio.helpers import ObjectWriteResult
 
 from ..core import config
-from ._minio_client import minio_client
+from ._minio_client import minio_client, public_minio_client
 from .minio_file import BaseMinObj
 from .minio_file_params import BaseFileParams, Chunk, Full
 
+# Пул для параллельной загрузки файлов. Общий на процесс, чтобы параллельные задачи
+# не открывали больше соединений с MinIO, чем MINIO_UPLOAD_WORKERS
+__upload_executor = ThreadPoolExecutor(max_workers=config.MINIO_UPLOAD_WORKERS, thread_name_prefix="minio-upload")
 
-def get_object(object_name: str, params: BaseFileParams):
+
+def get_object(object_name: str, params: BaseFileParams) -> Iterator[bytes]:
     """
     Получение объекта
-    """
-    response = None
-    stream = None
 
+    Запрос к MinIO выполняется сразу, чтобы ошибки (например, отсутствие объекта) проявились
+    до начала ответа клиенту. Тело читается кусками по MINIO_DOWNLOAD_CHUNK_SIZE по мере
+    отправки, соединение возвращается в пул только после того, как тело прочитано
+    или итерация прервана
+    """
     match params:
         case Chunk():
             response = minio_client.get_object(
@@ -27,13 +38,26 @@ def get_object(object_name: str, params: BaseFileParams):
                 offset=params.first_byte,
                 length=params.length,
             )
-            stream = response.stream(params.length)
         case Full():
             response = minio_client.get_object(config.MINIO_BUCKET, object_name)
-            stream = response.stream(params.file_length)
+        case _:
+            raise ValueError(f"Unsupported params: {params}")
+
+    return __stream_response(response)
+
 
-    response.close()
-    return stream
+def get_presigned_url(object_name: str, content_type: Optional[str] = None) -> str:
+    """
+    Подписанная ссылка на скачивание объекта напрямую из MinIO.
+    Живет PRESIGNED_URL_EXPIRE_SECONDS секунд
+    """
+    response_headers = {"response-content-type": content_type} if content_type else None
+    return public_minio_client.presigned_get_object(
+        config.MINIO_BUCKET,
+        object_name,
+        expires=timedelta(seconds=config.PRESIGNED_URL_EXPIRE_SECONDS),
+        response_headers=response_headers,
+    )
 
 
 def list_objects(user_prefix):
@@ -47,20 +71,105 @@ def put_object(file: BaseMinObj):
     """
     Сохранение объекта
     """
-    input_stream = BytesIO(file.data)
-    try:
-        minio_client.put_object(
-            config.MINIO_BUCKET,
+    with BytesIO(file.data) as input_stream:
+        put_stream(
             object_name=file.object_name,
-            data=input_stream,
-            length=len(file.data),
+            source=input_stream,
             content_type=file.content_type,
+            length=len(file.data),
+        )
+
+
+def put_stream(
+    object_name: str,
+    source: Union[str, BinaryIO],
+    content_type: str,
+    length: Optional[int] = None,
+):
+    """
+    Сохранение объекта из файла без загрузки его целиком в память
+
+    Объекты больше MINIO_PART_SIZE, а также объекты неизвестного размера загружаются
+    по частям, по MINIO_PARALLEL_PARTS частей параллельно
+
+    Parameters
+    ----------
+    object_name
+        имя объекта
+    source
+        путь до файла или файловый объект, открытый на чтение в бинарном режиме
+    content_type
+        тип контента
+    length
+        размер объекта. Если не передан, определяется по файлу. Для потоков, размер
+        которых определить нельзя, объект загружается частями до конца потока
+
+    Returns
+    -------
+    результат загрузки, в том числе ETag объекта
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            return put_stream(object_name=object_name, source=f, content_type=content_type, length=length)
+
+    if length is None:
+        length = __get_length(source)
+
+    try:
+        return minio_client.put_object(
+            config.MINIO_BUCKET,
+            object_name=object_name,
+            data=source,
+            length=length,
+            content_type=content_type,
+            part_size=config.MINIO_PART_SIZE,
+            num_parallel_uploads=config.MINIO_PARALLEL_PARTS,
         )
     except S3Error as e:
         logging.error(f"Ошибка при загрузке файла: {e.code}: {e.message}")
         raise e
+
+
+def put_files(files: List[Tuple[str, str, str]]) -> List[ObjectWriteResult]:
+    """
+    Параллельное сохранение файлов с диска
+
+    Parameters
+    ----------
+    files
+        тройки (имя объекта, путь до файла, тип контента)
+
+    Returns
+    -------
+    результаты загрузки в порядке files
+
+    Raises
+    ------
+    первую ошибку загрузки, после того как завершатся все загрузки
+    """
+    futures = [
+        __upload_executor.submit(put_stream, object_name=object_name, source=file_path, content_type=content_type)
+        for object_name, file_path, content_type in files
+    ]
+    errors = [future.exception() for future in futures]
+    for error in errors:
+        if error:
+            raise error
+    return [future.result() for future in futures]
+
+
+@contextmanager
+def open_object(object_name: str) -> Iterator[BinaryIO]:
+    """
+    Чтение объекта потоком, без сохранения на диск. Поток не поддерживает seek.
+    Соединение возвращается в пул при выходе из контекста
+    """
+    response = minio_client.get_object(config.MINIO_BUCKET, object_name)
+    try:
+        yield response
     finally:
-        input_stream.close()
+        response.close()
+        response.release_conn()
 
 
 def remove_object(object_name):
@@ -104,3 +213,24 @@ def remove_files_by_user(username: str) -> Optional[int]:
 
     except S3Error as err:
         raise HTTPException(status_code=500, detail=f"Ошибка при удалении из MinIO: {err.message}")
+
+
+def __stream_response(response) -> Iterator[bytes]:
+    try:
+        yield from response.stream(config.MINIO_DOWNLOAD_CHUNK_SIZE)
+    finally:
+        response.close()
+        response.release_conn()
+
+
+def __get_length(source: BinaryIO) -> int:
+    """
+    Размер оставшейся части потока или -1, если определить его нельзя
+    """
+    try:
+        position = source.tell()
+        length = source.seek(0, os.SEEK_END) - position
+        source.seek(position)
+        return length
+    except (AttributeError, OSError):
+        return -1
@@ -0,0 +1,184 @@
+import logging
+import mimetypes
+import os
+import posixpath
+import shutil
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional
+
+from ..decoding.probe import ProbeResult, probe_audio
+from ..meta_parser.base_meta_parser import BaseMetaParser
+from ..meta_parser.factory import HEADER_SIZE, detect_parser
+from ..meta_parser.metadata import CoverMetaData, TrackMetaData
+from .models import AudioFileArchivedFile, CoverArchivedFile, ExtractedData
+
+logger = logging.getLogger(__name__)
+
+COVER_NAME = "cover.jpg"
+
+# Размер блока при копировании содержимого архива на диск
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class _CollectedTrack:
+    track_id: str
+    directory: str
+    original_name: str
+    metadata: TrackMetaData
+    probe: ProbeResult
+
+
+class ExtractedDataCollector:
+    """
+    Собирает ExtractedData из файлов архива по мере их чтения.
+
+    Файлы передаются потоками в порядке, в котором они лежат в архиве. На диск попадают только
+    аудиофайлы, обложки держатся в памяти, остальные файлы пропускаются после чтения заголовка.
+    Обложки привязываются к трекам в build, поэтому порядок файлов в архиве не важен.
+    Объект создается на каждое извлечение и не переиспользуется
+
+    Parameters
+    ----------
+    tmp_dir
+        временная директория, в которую сохраняются аудиофайлы
+    current_user
+        текущий пользователь
+    custom_dir
+        дополнительная директория, добавляется к путям файлов внутри архива
+    """
+
+    def __init__(self, tmp_dir: str, current_user: str, custom_dir: Optional[str] = None):
+        self.__tracks_dir = os.path.join(tmp_dir, "tracks")
+        self.__current_user = current_user
+        self.__custom_dir = custom_dir
+        self.__tracks: List[_CollectedTrack] = list()
+        self.__covers: Dict[str, CoverArchivedFile] = dict()
+
+        os.makedirs(self.__tracks_dir, exist_ok=True)
+
+    def add_member(self, name: str, stream: BinaryIO):
+        """
+        Обработка одного файла архива
+
+        Parameters
+        ----------
+        name
+            путь файла внутри архива
+        stream
+            поток с содержимым файла
+        """
+        if posixpath.basename(name) == COVER_NAME:
+            self.__add_cover(name, stream)
+        else:
+            self.__add_track(name, stream)
+
+    def build(self) -> ExtractedData:
+        """
+        Привязка обложек к трекам и формирование результата
+        """
+        tracks = [
+            AudioFileArchivedFile(
+                track_id=track.track_id,
+                original_name=track.original_name,
+                cover_id=self.__find_cover_id(track.directory),
+                metadata=track.metadata,
+                probe=track.probe,
+            )
+            for track in self.__tracks
+        ]
+        return ExtractedData(tracks=tracks, covers=list(self.__covers.values()))
+
+    def __add_track(self, name: str, stream: BinaryIO):
+        # Формат определяется по заголовку, остальное читается только для аудиофайлов
+        header = stream.read(HEADER_SIZE)
+        parser = detect_parser(header)
+        if not parser:
+            logger.warning(f"Could not find handler for file: {name}")
+            return
+
+        track_id = str(uuid.uuid4())
+        _, ext = posixpath.splitext(name)
+        local_path = os.path.join(self.__tracks_dir, f"{track_id}{ext}")
+
+        with open(local_path, "wb") as f:
+            f.write(header)
+            shutil.copyfileobj(stream, f, COPY_CHUNK_SIZE)
+
+        # Файл анализируется один раз, результат используется и для метаданных, и для конвертации
+        probe = probe_audio(local_path)
+        if not probe:
+            logger.warning(f"Could not read audio stream from file: {name}")
+            os.remove(local_path)
+            return
+
+        # Трек без метаданных пропускается, чтобы не сорвать загрузку остальных файлов архива
+        metadata = self.__get_metadata(name, parser, probe)
+        if not metadata:
+            os.remove(local_path)
+            return
+
+        self.__tracks.append(
+            _CollectedTrack(
+                track_id=track_id,
+                directory=posixpath.dirname(name),
+                original_name=self.__get_original_name(name),
+                metadata=metadata,
+                probe=probe,
+            )
+        )
+
+    @staticmethod
+    def __get_metadata(name: str, parser: BaseMetaParser, probe: ProbeResult) -> Optional[TrackMetaData]:
+        try:
+            metadata = parser.get_metadata(probe)
+        except Exception as e:
+            logger.warning(f"Could not read metadata from file: {name}: {e}")
+            return None
+
+        if not metadata.mime:
+            logger.warning(f"Could not detect mime type of file: {name}")
+            return None
+        if not metadata.track_title:
+            # Трек без тега названия называется по имени файла
+            metadata = metadata.model_copy(update={"track_title": posixpath.basename(posixpath.normpath(name))})
+        return metadata
+
+    def __add_cover(self, name: str, stream: BinaryIO):
+        content: bytes = stream.read()
+        cover_id = str(uuid.uuid4())
+
+        # путь до обложки в MinIO
+        object_name = f"{self.__current_user}/covers/{cover_id}.jpg"
+
+        mimetype, _ = mimetypes.guess_type(name)
+
+        self.__covers[posixpath.dirname(name)] = CoverArchivedFile(
+            cover_id=cover_id,
+            original_name=object_name,
+            cover_bytes=content,
+            metadata=CoverMetaData(
+                mime=mimetype,
+                width=None,
+                heigth=None,
+                bytes=content,
+                format="jpg",
+            ),
+        )
+
+    def __find_cover_id(self, directory: str) -> Optional[str]:
+        """
+        Поиск обложки в директории трека, а затем в родительских директориях
+        """
+        while True:
+            cover = self.__covers.get(directory)
+            if cover:
+                return cover.id
+            if not directory:
+                return None
+            directory = posixpath.dirname(directory)
+
+    def __get_original_name(self, name: str) -> str:
+        name = name.lstrip("/")
+        return posixpath.join(self.__custom_dir, name) if self.__custom_dir else name
@@ -1,14 +1,41 @@
-from typing import Optional
-
-from fastapi import UploadFile
+import gzip
+import posixpath
+from typing import BinaryIO, Optional, Union
 
 from app.services.archive_handler.archive_handler import ArchiveHandler
 
+from .._collector import ExtractedDataCollector
+from ..models import ExtractedData
+
 
 class GzArchiveHandler(ArchiveHandler):
     """
-    Хэндлер для gz архивов
+    Хэндлер для gz архивов.
+
+    gz содержит ровно один сжатый файл. Он распаковывается потоком и блоками пишется на диск,
+    поэтому распакованный трек целиком в памяти не оказывается
     """
 
-    def extract(self, upload_file: UploadFile, current_user, on_exctract, custom_dir: Optional[str] = None):
-        pass
+    def extract(
+            self,
+            source: Union[str, BinaryIO],
+            tmp_dir,
+            current_user,
+            custom_dir: Optional[str] = None,
+            archive_name: Optional[str] = None,
+    ) -> ExtractedData:
+        collector = ExtractedDataCollector(tmp_dir=tmp_dir, current_user=current_user, custom_dir=custom_dir)
+
+        with gzip.open(source, "rb") as stream:
+            collector.add_member(self.__get_track_name(archive_name), stream)
+
+        return collector.build()
+
+    def __get_track_name(self, archive_name: Optional[str]) -> str:
+        """
+        Имя трека - имя архива без расширения .gz
+        """
+        name = posixpath.basename(archive_name or "")
+        if name.lower().endswith(".gz"):
+            name = name[:-3]
+        return name or "track"
@@ -1,18 +1,47 @@
-from typing import Optional
-
-from fastapi import UploadFile
+import tarfile
+from typing import BinaryIO, Optional, Union
 
 from app.services.archive_handler.archive_handler import ArchiveHandler
 
+from .._collector import ExtractedDataCollector
+from ..models import ExtractedData
+
 
 class TarArchiveHandler(ArchiveHandler):
     """
     Хэндлер для tar архивов
+
+    Parameters
+    ----------
+    mode
+        режим открытия архива. Используются потоковые режимы (r|, r|gz, ...):
+        архив читается последовательно, без seek, и файлы обрабатываются по мере распаковки
     """
 
-    def __init__(self, mode="r:*"):
+    def __init__(self, mode="r|*"):
         self.mode = mode
-        
-    def extract(self, upload_file: UploadFile, current_user, on_exctract, custom_dir: Optional[str] = None):
-        pass
 
+    def extract(
+            self,
+            source: Union[str, BinaryIO],
+            tmp_dir,
+            current_user,
+            custom_dir: Optional[str] = None,
+            archive_name: Optional[str] = None,
+    ) -> ExtractedData:
+        collector = ExtractedDataCollector(tmp_dir=tmp_dir, current_user=current_user, custom_dir=custom_dir)
+
+        if isinstance(source, str):
+            archive = tarfile.open(name=source, mode=self.mode)
+        else:
+            archive = tarfile.open(fileobj=source, mode=self.mode)
+
+        with archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                # В потоковом режиме файл нужно дочитать до перехода к следующему члену архива,
+                # поэтому он сразу передается в обработку
+                collector.add_member(member.name, archive.extractfile(member))
+
+        return collector.build()
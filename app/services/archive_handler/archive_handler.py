@@ -1,32 +1,45 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import BinaryIO, Optional, Union
 
 from app.services.archive_handler.models import ExtractedData
 
 class ArchiveHandler(ABC):
     """
     Абстрактный класс хэндлера
+
+    Attributes
+    ----------
+    requires_seekable_source
+        хэндлеру нужен источник с поддержкой seek. Остальные хэндлеры читают архив последовательно
+        и могут распаковывать его прямо из сетевого потока
     """
 
+    requires_seekable_source: bool = False
+
     @abstractmethod
     def extract(
         self,
-        zip_path,
+        source: Union[str, BinaryIO],
         tmp_dir,
         current_user,
         custom_dir: Optional[str] = None,
+        archive_name: Optional[str] = None,
     ) -> ExtractedData:
         """
         Извлечение файлов из архива
 
         Parameters
         ----------
-        upload_file : UploadFile
-            загружаемый арихв
+        source : Union[str, BinaryIO]
+            загружаемый архив: путь до файла или файловый объект
+        tmp_dir
+            временная директория, в которую сохраняются извлеченные аудиофайлы
         current_user
             текущий пользователь
         custom_dir : Union[str, None]
             дополнительная директория.
             Указывается в том случае, если архив загружается не в корень директории пользователя в MinIO
+        archive_name : Union[str, None]
+            имя загруженного архива. Используется, если в самом архиве нет имен файлов (gz)
         """
         pass
@@ -7,9 +7,9 @@ from .archive_handler import ArchiveHandler
 
 __handlers_map = {
     ".zip": ZipArchiveHandler(),
-    ".tar": TarArchiveHandler("r:"),
-    ".tar.gz": TarArchiveHandler("r:gz"),
-    ".tgz": TarArchiveHandler("r:gz"),
+    ".tar": TarArchiveHandler("r|"),
+    ".tar.gz": TarArchiveHandler("r|gz"),
+    ".tgz": TarArchiveHandler("r|gz"),
     ".gz": GzArchiveHandler(),
 }
 
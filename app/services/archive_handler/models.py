@@ -4,6 +4,7 @@ from dataclasses import dataclass
 
 from pydantic import BaseModel
 
+from app.services.decoding.probe import ProbeResult
 from app.services.meta_parser.metadata import TrackMetaData, CoverMetaData
 
 class ArchivedFile(ABC):
@@ -29,13 +30,16 @@ class AudioFileArchivedFile(ArchivedFile):
         id обложки
     metadata: TrackMetaData
         метаданные аудиофайла
+    probe: ProbeResult
+        результат анализа аудиофайла, переиспользуется при конвертации
     """
-    def __init__(self, track_id, original_name, cover_id, metadata: TrackMetaData):
+    def __init__(self, track_id, original_name, cover_id, metadata: TrackMetaData, probe: ProbeResult):
         self.id = track_id
         self.original_name = original_name
         self.content_bytes = None
         self.cover_id = cover_id
         self.metadata = metadata
+        self.probe = probe
 
 
 class CoverArchivedFile(ArchivedFile):
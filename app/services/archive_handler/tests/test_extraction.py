@@ -0,0 +1,108 @@
+import gzip
+import io
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from app.services.archive_handler.factory import get_archive_handler
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz: заголовок фрейма и тишина до длины фрейма (417 байт)
+MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + b"\x00" * 413
+MP3_BYTES = MP3_FRAME * 40
+COVER_BYTES = b"\xff\xd8\xff\xe0cover"
+
+
+class NonSeekableStream(io.RawIOBase):
+    """
+    Поток без seek, как ответ MinIO
+    """
+
+    def __init__(self, content: bytes):
+        self.__content = io.BytesIO(content)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        return self.__content.readinto(buffer)
+
+
+def build_zip(members: dict[str, bytes]) -> bytes:
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return content.getvalue()
+
+
+def build_tar(members: dict[str, bytes], mode: str = "w") -> bytes:
+    content = io.BytesIO()
+    with tarfile.open(fileobj=content, mode=mode) as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return content.getvalue()
+
+
+class TestArchiveExtraction(unittest.TestCase):
+    members = {
+        "Album/cover.jpg": COVER_BYTES,
+        "Album/CD1/01.mp3": MP3_BYTES,
+        "Album/CD1/notes.txt": b"not an audio file",
+        "Single/02.mp3": MP3_BYTES,
+    }
+
+    def extract(self, archive_name: str, source, custom_dir=None):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        handler = get_archive_handler(archive_name)
+        return handler.extract(
+            source=source,
+            tmp_dir=tmp_dir.name,
+            current_user="user",
+            custom_dir=custom_dir,
+            archive_name=archive_name,
+        )
+
+    def assert_extracted(self, data):
+        tracks = {track.original_name: track for track in data.tracks}
+        self.assertEqual(set(tracks), {"Album/CD1/01.mp3", "Single/02.mp3"})
+        self.assertEqual(len(data.covers), 1)
+
+        cover = data.covers[0]
+        self.assertEqual(cover.bytes, COVER_BYTES)
+        # Обложка лежит в родительской директории трека
+        self.assertEqual(tracks["Album/CD1/01.mp3"].cover_id, cover.id)
+        self.assertIsNone(tracks["Single/02.mp3"].cover_id)
+
+        for track in tracks.values():
+            self.assertEqual(track.metadata.mime, "audio/mpeg")
+            self.assertEqual(track.probe.format, "mp3")
+
+    def test_zip(self):
+        self.assert_extracted(self.extract("album.zip", io.BytesIO(build_zip(self.members))))
+
+    def test_tar_non_seekable(self):
+        source = NonSeekableStream(build_tar(self.members))
+        self.assert_extracted(self.extract("album.tar", source))
+
+    def test_tar_gz_non_seekable(self):
+        source = NonSeekableStream(build_tar(self.members, mode="w:gz"))
+        self.assert_extracted(self.extract("album.tar.gz", source))
+
+    def test_custom_dir(self):
+        data = self.extract("album.zip", io.BytesIO(build_zip(self.members)), custom_dir="Mix")
+
+        self.assertEqual(
+            sorted(track.original_name for track in data.tracks),
+            ["Mix/Album/CD1/01.mp3", "Mix/Single/02.mp3"],
+        )
+
+    def test_gz_track_without_extension(self):
+        source = NonSeekableStream(gzip.compress(MP3_BYTES))
+        data = self.extract("song.gz", source)
+
+        self.assertEqual([track.original_name for track in data.tracks], ["song"])
+        self.assertEqual(data.tracks[0].metadata.mime, "audio/mpeg")
@@ -1,51 +1,121 @@
-    
-import json
-import mimetypes
+import logging
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, List, Optional
 
+from app.core import config
+from app.services.archive_handler.models import AudioFileArchivedFile
 
-def get_audio_params(input_path: str):
-    cmd = [
-        "ffprobe", "-v", "quiet",
-        "-print_format", "json", "-show_format", "-show_streams",
-        input_path
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    info = json.loads(result.stdout)
-    stream = info["streams"][0]
-    tags = info.get("format").get("tags")
-    mime_type, _ = mimetypes.guess_type(input_path)
-
-    return {
-        "bit_rate": int(stream.get("bit_rate", 128000)),
-        "sample_rate": int(stream.get("sample_rate", 44100)),
-        "channels": int(stream.get("channels", 2)),
-        "tags": {
-            "artist": tags.get("artist"),
-            "album": tags.get("album"),
-            "mime": mime_type,
-            "track_title": tags.get("title"),
-            "track_number": tags.get("track"),
-            "genre": tags.get("genre"),
-        }
-    }
-
-def convert_audio(file_id: str, file_path: str, output_path: str):
-    params = get_audio_params(input_path=file_path)
+from .probe import ProbeResult
+
+
+@dataclass(frozen=True)
+class ConversionResult:
+    """
+    Результат конвертации одного трека в HLS
+
+    Attributes
+    ---
+    track_id
+        id трека
+    output_dir
+        директория с плейлистом и сегментами
+    error
+        ошибка конвертации. None, если трек сконвертирован успешно
+    """
+
+    track_id: str
+    output_dir: str
+    error: Optional[Exception] = None
+
+    @property
+    def is_success(self) -> bool:
+        return self.error is None
+
+
+def can_stream_copy(probe: ProbeResult) -> bool:
+    """
+    Можно ли нарезать исходный поток на сегменты без перекодирования:
+    кодек поддерживается HLS и битрейт не превышает целевой
+    """
+    return probe.codec in config.HLS_STREAM_COPY_CODECS and probe.bit_rate <= config.HLS_MAX_BIT_RATE
+
+
+def convert_audio(file_id: str, probe: ProbeResult, output_path: str):
+    file_path = probe.path
     out_dir = f"{output_path}/{file_id}"
 
     os.makedirs(out_dir, exist_ok=True)
 
+    if can_stream_copy(probe):
+        # Исходный поток уже подходит для HLS: только режем на сегменты
+        codec_args = ['-c:a', 'copy']
+    else:
+        codec_args = [
+            '-ar', f"{probe.sample_rate}",
+            '-ac', f"{probe.channels}",
+            '-b:a', f"{min(probe.bit_rate, config.HLS_MAX_BIT_RATE)}",
+        ]
+
     command = [
         'ffmpeg',
         '-i', file_path, # путь до обрабатываемого файла
         '-vn',
-        '-ar', f"{params['sample_rate']}",
-        '-ac', f"{params['channels']}",
+        *codec_args,
         '-hls_time', '10', # размер чанка
-        '-b:a', f"{params['bit_rate']}",
         "-hls_segment_filename", os.path.join(out_dir, "segment_%03d.ts"), # правило именования файла с чанком
         os.path.join(out_dir, "playlist.m3u8"), # имя манифеста
     ]
-    subprocess.run(command, check=True)
\ No newline at end of file
+    subprocess.run(command, check=True)
+
+
+def convert_tracks(
+        tracks: List[AudioFileArchivedFile],
+        output_path: str,
+        max_workers: int = config.TRANSCODE_WORKERS,
+        on_result: Optional[Callable[[ConversionResult], None]] = None,
+) -> List[ConversionResult]:
+    """
+    Параллельная конвертация треков в HLS.
+
+    Каждый трек конвертируется отдельным процессом ffmpeg, количество одновременно запущенных
+    процессов ограничено max_workers. Ошибка конвертации одного трека не прерывает обработку остальных:
+    она логируется и возвращается в ConversionResult.error
+
+    Parameters
+    ----------
+    tracks
+        треки для конвертации
+    output_path
+        директория, в которой для каждого трека будет создана поддиректория <track_id>
+    max_workers
+        максимальное количество одновременно работающих процессов ffmpeg
+    on_result
+        вызывается сразу после завершения конвертации каждого трека, в порядке завершения
+    """
+    if not tracks:
+        return []
+
+    def __convert(track: AudioFileArchivedFile) -> ConversionResult:
+        out_dir = f"{output_path}/{track.id}"
+        try:
+            convert_audio(file_id=track.id, probe=track.probe, output_path=output_path)
+        except Exception as e:
+            logging.error(f"Failed to convert {track.original_name}: {e}")
+            return ConversionResult(track_id=track.id, output_dir=out_dir, error=e)
+        return ConversionResult(track_id=track.id, output_dir=out_dir)
+
+    # ffmpeg работает в отдельном процессе, поэтому потоков достаточно: GIL не мешает
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tracks)))) as executor:
+        futures = [executor.submit(__convert, track) for track in tracks]
+        results = {}
+        for future in as_completed(futures):
+            result = future.result()
+            results[result.track_id] = result
+            if on_result:
+                on_result(result)
+
+    # Сохраняем порядок треков, в котором они были переданы
+    return [results[track.id] for track in tracks]
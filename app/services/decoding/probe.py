@@ -0,0 +1,176 @@
+import json
+import logging
+import mimetypes
+import subprocess
+from dataclasses import dataclass, field
+from typing import Optional
+
+import mutagen
+from mutagen.mp3 import MP3
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """
+    Результат однократного анализа аудиофайла.
+    Создается один раз на файл и используется и парсером метаданных, и транскодером
+
+    Attributes
+    ---
+    path
+        путь до файла
+    format
+        формат контейнера (mp3, ...)
+    codec
+        кодек аудиопотока
+    bit_rate
+        битрейт аудиопотока
+    sample_rate
+        частота дискретизации
+    channels
+        количество каналов
+    duration
+        длительность в секундах
+    mime
+        mime тип файла
+    tags
+        теги файла: artist, album, track_title, track_number, genre
+    """
+
+    path: str
+    format: Optional[str]
+    codec: Optional[str]
+    bit_rate: int
+    sample_rate: int
+    channels: int
+    duration: Optional[float]
+    mime: Optional[str]
+    tags: dict[str, Optional[str]] = field(default_factory=dict)
+
+
+# Форматы, которые читаются в процессе через mutagen: класс файла mutagen -> (формат, кодек)
+__native_formats = {
+    MP3: ("mp3", "mp3"),
+}
+
+# mime типы форматов контейнера. Имя файла в архиве может быть без расширения (например, song.gz),
+# поэтому mime определяется по формату, а по имени файла только для форматов не из списка
+__format_mime_types = {
+    "mp3": "audio/mpeg",
+    "flac": "audio/flac",
+    "ogg": "audio/ogg",
+    "wav": "audio/wav",
+    "aac": "audio/aac",
+    "mov": "audio/mp4",
+}
+
+
+def probe_audio(input_path: str) -> Optional[ProbeResult]:
+    """
+    Анализ аудиофайла. Вернет None, если файл не содержит аудиопотока.
+
+    Заголовок и теги читаются в процессе через mutagen, ffprobe запускается
+    только для форматов, которые mutagen прочитать не может
+    """
+    return _probe_with_mutagen(input_path) or _probe_with_ffprobe(input_path)
+
+
+def _probe_with_mutagen(input_path: str) -> Optional[ProbeResult]:
+    """
+    Анализ аудиофайла через mutagen: читается только заголовок и теги, без запуска процессов
+    """
+    try:
+        audio = mutagen.File(input_path, easy=True)
+    except mutagen.MutagenError as e:
+        logging.warning(f"mutagen could not read {input_path}: {e}")
+        return None
+
+    native_format = next(
+        (value for cls, value in __native_formats.items() if isinstance(audio, cls)),
+        None,
+    )
+    if native_format is None:
+        return None
+
+    file_format, codec = native_format
+    tags = audio.tags or {}
+
+    def __tag(key: str) -> Optional[str]:
+        values = tags.get(key)
+        return values[0] if values else None
+
+    return ProbeResult(
+        path=input_path,
+        format=file_format,
+        codec=codec,
+        bit_rate=int(getattr(audio.info, "bitrate", 0) or 128000),
+        sample_rate=int(getattr(audio.info, "sample_rate", 0) or 44100),
+        channels=int(getattr(audio.info, "channels", 0) or 2),
+        duration=audio.info.length or None,
+        mime=_get_mime_type(file_format, input_path),
+        tags={
+            "artist": __tag("artist"),
+            "album": __tag("album"),
+            "track_title": __tag("title"),
+            "track_number": __tag("tracknumber"),
+            "genre": __tag("genre"),
+        },
+    )
+
+
+def _probe_with_ffprobe(input_path: str) -> Optional[ProbeResult]:
+    """
+    Анализ аудиофайла через ffprobe
+    """
+    cmd = [
+        "ffprobe", "-v", "quiet",
+        "-print_format", "json", "-show_format", "-show_streams",
+        input_path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    except subprocess.CalledProcessError:
+        logging.warning(f"ffprobe could not read {input_path}")
+        return None
+
+    info = json.loads(result.stdout)
+    # Обложка в mp3 тоже видна как поток (видео), поэтому берем первый аудиопоток
+    stream = next((s for s in info.get("streams", []) if s.get("codec_type") == "audio"), None)
+    if stream is None:
+        return None
+
+    file_format = info.get("format", {})
+    tags = file_format.get("tags", {})
+    duration = file_format.get("duration")
+
+    return ProbeResult(
+        path=input_path,
+        format=file_format.get("format_name"),
+        codec=stream.get("codec_name"),
+        bit_rate=int(stream.get("bit_rate", 128000)),
+        sample_rate=int(stream.get("sample_rate", 44100)),
+        channels=int(stream.get("channels", 2)),
+        duration=float(duration) if duration else None,
+        mime=_get_mime_type(file_format.get("format_name"), input_path),
+        tags={
+            "artist": tags.get("artist"),
+            "album": tags.get("album"),
+            "track_title": tags.get("title"),
+            "track_number": tags.get("track"),
+            "genre": tags.get("genre"),
+        },
+    )
+
+
+def _get_mime_type(file_format: Optional[str], input_path: str) -> Optional[str]:
+    """
+    mime тип по формату контейнера. ffprobe может вернуть несколько форматов через запятую
+    (mov,mp4,m4a,...), берется первый известный. Для неизвестных форматов mime угадывается по имени файла
+    """
+    for name in (file_format or "").split(","):
+        mime_type = __format_mime_types.get(name)
+        if mime_type:
+            return mime_type
+
+    mime_type, _ = mimetypes.guess_type(input_path)
+    return mime_type
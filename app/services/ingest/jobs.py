@@ -0,0 +1,87 @@
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO, List, Optional, Tuple
+
+from app.db import job_repository
+
+from ...core import config
+from ...core.models.upload_job_dto import UploadJobDto
+from ...minio import minio_repository
+
+
+@dataclass(frozen=True)
+class JobEvent:
+    """
+    Событие задачи загрузки для клиентов, подписанных на прогресс
+
+    Attributes
+    ---
+    type
+        тип события: status - смена статуса задачи, track - смена этапа трека
+    data
+        данные события
+    """
+
+    type: str
+    data: dict
+
+
+def submit_upload_job(
+        owner_id: str,
+        files: List[Tuple[str, BinaryIO]],
+        custom_dir: Optional[str] = None,
+) -> UploadJobDto:
+    """
+    Постановка загрузки в очередь.
+    Архивы сохраняются в MinIO под UPLOAD_STAGING_PREFIX, откуда их забирает воркер
+
+    Parameters
+    ----------
+    owner_id
+        id пользователя, который загружает архивы
+    files
+        пары (имя архива, файл архива)
+    custom_dir
+        дополнительная директория для треков архивов
+    """
+    job_id = str(uuid.uuid4())
+    archives = []
+
+    for index, (archive_name, source) in enumerate(files):
+        object_name = f"{config.UPLOAD_STAGING_PREFIX}/{job_id}/{index}"
+        source.seek(0)
+        minio_repository.put_stream(
+            object_name=object_name,
+            source=source,
+            content_type="application/octet-stream",
+        )
+        archives.append({"name": archive_name, "object_name": object_name})
+
+    return job_repository.create_job(job_id=job_id, owner_id=owner_id, archives=archives, custom_dir=custom_dir)
+
+
+def get_job(job_id: str, owner_id: str) -> Optional[UploadJobDto]:
+    """
+    Получение задачи загрузки. Вернет None, если задачи нет или она принадлежит другому пользователю
+    """
+    db_job = job_repository.get_job(job_id)
+    if db_job is None or db_job.owner_id != owner_id:
+        return None
+    return job_repository.to_dto(db_job)
+
+
+def get_job_events(previous: Optional[UploadJobDto], current: UploadJobDto) -> List[JobEvent]:
+    """
+    События, которые произошли между двумя состояниями задачи
+    """
+    previous_tracks = {track.track_id: track for track in previous.tracks} if previous else {}
+    events = [
+        JobEvent(type="track", data=track.model_dump())
+        for track in current.tracks
+        if previous_tracks.get(track.track_id) != track
+    ]
+
+    if previous is None or previous.status != current.status:
+        events.append(JobEvent(type="status", data={"status": current.status.value, "error": current.error}))
+
+    return events
@@ -0,0 +1,209 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator, List, Optional
+
+from sqlalchemy import Update
+
+from app.db import audio_repository
+
+from ...core.models.file_dto import CoverInDto, FileCreateDto, FileDto
+from ...minio import minio_repository
+from ...minio.minio_file import MinioFile
+from ..archive_handler._collector import COPY_CHUNK_SIZE
+from ..archive_handler.archive_handler import ArchiveHandler
+from ..archive_handler.factory import get_archive_handler
+from ..archive_handler.models import AudioFileArchivedFile
+from ..decoding.decoding import ConversionResult, convert_tracks
+from .progress import TrackProgress, TrackStage
+
+# Типы контента файлов HLS
+__hls_content_types = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+}
+
+
+class CheckpointRejected(Exception):
+    """
+    Запрос checkpoint не изменил ни одной строки, метаданные архива не сохранены
+    """
+
+
+def ingest_archive(
+        source: BinaryIO,
+        archive_name: str,
+        owner_id: str,
+        custom_dir: Optional[str] = None,
+        on_progress: Optional[Callable[[TrackProgress], None]] = None,
+        checkpoint: Optional[Callable[[List[FileDto]], Update]] = None,
+) -> List[FileDto]:
+    """
+    Полный цикл загрузки архива: извлечение, конвертация в HLS, сохранение метаданных в БД и файлов в MinIO
+
+    Parameters
+    ----------
+    source
+        файл архива. Может не поддерживать seek (например, поток из MinIO):
+        на диск он копируется, только если этого требует хэндлер (zip)
+    archive_name
+        имя архива, по расширению выбирается хэндлер
+    owner_id
+        id пользователя, который загружает архив
+    custom_dir
+        дополнительная директория для треков архива
+    on_progress
+        вызывается при переходе каждого трека на очередной этап обработки
+    checkpoint
+        по метаданным загруженных треков возвращает запрос, который выполняется в одной транзакции
+        с сохранением метаданных в БД (например, отметка о том, что архив обработан)
+
+    Raises
+    ------
+    CheckpointRejected
+        если запрос checkpoint не изменил ни одной строки. Метаданные в этом случае не сохраняются
+
+    Returns
+    -------
+    метаданные успешно загруженных треков. Если для архива нет хэндлера, вернет пустой список
+    """
+    matched_handler = get_archive_handler(archive_name.lower())
+    if not matched_handler:
+        return []
+
+    def __notify(progress: TrackProgress):
+        if on_progress:
+            on_progress(progress)
+
+    with tempfile.TemporaryDirectory() as tmpdir, __seekable(source, matched_handler) as source:
+        data = matched_handler.extract(
+            source=source,
+            tmp_dir=tmpdir,
+            current_user=owner_id,
+            custom_dir=custom_dir,
+            archive_name=archive_name,
+        )
+
+        names = {track.id: track.original_name for track in data.tracks}
+        for track in data.tracks:
+            __notify(TrackProgress(track_id=track.id, original_name=track.original_name, stage=TrackStage.FOUND))
+
+        for cover in data.covers:
+            minio_repository.put_object(
+                MinioFile(
+                    object_name=cover.original_name,
+                    data=cover.bytes,
+                    content_type=cover.metadata.mime,
+                )
+            )
+
+        minio_dir = f"{tmpdir}/minio"
+
+        def __on_converted(conversion: ConversionResult):
+            __notify(
+                TrackProgress(
+                    track_id=conversion.track_id,
+                    original_name=names[conversion.track_id],
+                    stage=TrackStage.CONVERTED if conversion.is_success else TrackStage.FAILED,
+                    error=None if conversion.is_success else str(conversion.error),
+                )
+            )
+
+        # Все треки архива конвертируются параллельно, упавшие треки пропускаются
+        conversions = convert_tracks(tracks=data.tracks, output_path=minio_dir, on_result=__on_converted)
+        converted_tracks = [
+            audio_file for audio_file, conversion in zip(data.tracks, conversions)
+            if conversion.is_success
+        ]
+
+        uploaded_files = []
+        for audio_file in converted_tracks:
+            # Оригинал, плейлист и все сегменты трека загружаются параллельно, прямо с диска
+            track_dir = f"{minio_dir}/{audio_file.id}"
+            original = __get_original_object_name(owner_id=owner_id, audio_file=audio_file)
+            results = minio_repository.put_files(
+                [(original, audio_file.probe.path, audio_file.metadata.mime)]
+                + [
+                    (f"{owner_id}/{audio_file.id}/{ff}", f"{track_dir}/{ff}", __get_hls_content_type(ff))
+                    for ff in os.listdir(track_dir)
+                ]
+            )
+            uploaded_files.append(
+                FileCreateDto(
+                    id=audio_file.id,
+                    original_name=audio_file.original_name,
+                    minio_object_name=original,
+                    size_bytes=os.path.getsize(audio_file.probe.path),
+                    etag=results[0].etag,
+                    duration=audio_file.probe.duration,
+                    track_title=audio_file.metadata.track_title,
+                    track_number=audio_file.metadata.track_number,
+                    artist=audio_file.metadata.artist,
+                    album=audio_file.metadata.album,
+                    mime_type=audio_file.metadata.mime,
+                    genre=audio_file.metadata.genre,
+                    cover=audio_file.cover_id,
+                )
+            )
+
+            __notify(
+                TrackProgress(track_id=audio_file.id, original_name=audio_file.original_name, stage=TrackStage.UPLOADED)
+            )
+
+        result = [
+            FileDto(
+                id=tr.id,
+                original_name=tr.original_name,
+                minio_object_name=uploaded.minio_object_name,
+                track_title=tr.metadata.track_title,
+                track_number=int(tr.metadata.track_number),
+                album=tr.metadata.album,
+                artist=tr.metadata.artist,
+                genre=tr.metadata.genre,
+                cover=tr.cover_id,
+                mime_type=tr.metadata.mime,
+            )
+            for tr, uploaded in zip(converted_tracks, uploaded_files)
+        ]
+
+        # Метаданные всего архива сохраняются одной транзакцией, когда все файлы уже лежат в MinIO
+        is_saved = audio_repository.create_files_bulk(
+            covers=[CoverInDto(id=cover.id, minio_object_name=cover.original_name) for cover in data.covers],
+            files=uploaded_files,
+            owner_id=owner_id,
+            checkpoint=checkpoint(result) if checkpoint else None,
+        )
+        if not is_saved:
+            raise CheckpointRejected(archive_name)
+
+        return result
+
+
+@contextmanager
+def __seekable(source: BinaryIO, handler: ArchiveHandler) -> Iterator[BinaryIO]:
+    """
+    Источник, подходящий хэндлеру. Поток без seek копируется во временный файл,
+    только если хэндлер не умеет читать архив последовательно
+    """
+    if not handler.requires_seekable_source or source.seekable():
+        yield source
+        return
+
+    with tempfile.TemporaryFile() as spooled:
+        shutil.copyfileobj(source, spooled, COPY_CHUNK_SIZE)
+        spooled.seek(0)
+        yield spooled
+
+
+def __get_hls_content_type(filename: str) -> str:
+    _, ext = os.path.splitext(filename)
+    return __hls_content_types.get(ext, "application/octet-stream")
+
+
+def __get_original_object_name(owner_id: str, audio_file: AudioFileArchivedFile) -> str:
+    """
+    Имя оригинального файла трека в MinIO: рядом с HLS-сегментами трека
+    """
+    _, ext = os.path.splitext(audio_file.probe.path)
+    return f"{owner_id}/{audio_file.id}/original{ext}"
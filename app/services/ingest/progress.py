@@ -0,0 +1,37 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+
+class TrackStage(str, Enum):
+    """
+    Этапы обработки трека при загрузке
+    """
+
+    FOUND = "found"
+    CONVERTED = "converted"
+    UPLOADED = "uploaded"
+    FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class TrackProgress:
+    """
+    Событие о переходе трека на очередной этап обработки
+
+    Attributes
+    ---
+    track_id
+        id трека
+    original_name
+        имя трека внутри архива
+    stage
+        этап, на который перешел трек
+    error
+        описание ошибки для этапа FAILED
+    """
+
+    track_id: str
+    original_name: str
+    stage: TrackStage
+    error: Optional[str] = None
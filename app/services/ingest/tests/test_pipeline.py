@@ -0,0 +1,83 @@
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from types import SimpleNamespace
+from unittest import mock
+
+from mutagen.id3 import ID3, TIT2
+
+from app.services.decoding.decoding import ConversionResult
+
+# Клиент MinIO проверяет бакет при импорте
+with mock.patch("minio.Minio.bucket_exists", return_value=True):
+    from app.services.ingest import pipeline
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz: заголовок фрейма и тишина до длины фрейма (417 байт)
+MP3_BYTES = (bytes([0xFF, 0xFB, 0x90, 0x64]) + b"\x00" * 413) * 40
+
+
+def tagged_mp3(title: str) -> bytes:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "track.mp3")
+        with open(path, "wb") as f:
+            f.write(MP3_BYTES)
+        tags = ID3()
+        tags.add(TIT2(encoding=3, text=title))
+        tags.save(path)
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def fake_convert_tracks(tracks, output_path, on_result=None, **_):
+    results = []
+    for track in tracks:
+        output_dir = os.path.join(output_path, track.id)
+        os.makedirs(output_dir)
+        with open(os.path.join(output_dir, "index.m3u8"), "w") as f:
+            f.write("#EXTM3U")
+        result = ConversionResult(track_id=track.id, output_dir=output_dir)
+        if on_result:
+            on_result(result)
+        results.append(result)
+    return results
+
+
+class TestIngestArchive(unittest.TestCase):
+    def setUp(self):
+        patchers = [
+            mock.patch.object(pipeline, "convert_tracks", side_effect=fake_convert_tracks),
+            mock.patch.object(pipeline.minio_repository, "put_object"),
+            mock.patch.object(
+                pipeline.minio_repository,
+                "put_files",
+                side_effect=lambda files: [SimpleNamespace(etag="etag") for _ in files],
+            ),
+            mock.patch.object(pipeline.audio_repository, "create_files_bulk", return_value=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def ingest(self, members: dict[str, bytes]):
+        content = io.BytesIO()
+        with zipfile.ZipFile(content, "w") as archive:
+            for name, data in members.items():
+                archive.writestr(name, data)
+        content.seek(0)
+        return pipeline.ingest_archive(source=content, archive_name="album.zip", owner_id="user")
+
+    def test_untagged_track_named_after_file(self):
+        result = self.ingest({"Album/01 Intro.mp3": MP3_BYTES, "Album/02.mp3": tagged_mp3("Come Together")})
+
+        self.assertEqual(
+            sorted(file.track_title for file in result),
+            ["01 Intro.mp3", "Come Together"],
+        )
+        saved = pipeline.audio_repository.create_files_bulk.call_args.kwargs["files"]
+        self.assertEqual(
+            sorted(file.track_title for file in saved),
+            ["01 Intro.mp3", "Come Together"],
+        )
+        self.assertTrue(all(file.mime_type == "audio/mpeg" for file in saved))
@@ -0,0 +1,221 @@
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta, UTC
+from typing import List
+
+from sqlalchemy import Update
+
+from app.db import job_repository
+
+from ...core import config
+from ...core.models.file_dto import FileDto
+from ...core.models.upload_job_dto import TrackProgressDto
+from ...db._entities import UploadJobDbEntity
+from ...minio import minio_repository
+from .pipeline import CheckpointRejected, ingest_archive
+from .progress import TrackProgress
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """
+    Задачу захватил другой воркер: текущий воркер должен прекратить ее выполнение
+    """
+
+
+class _JobReporter:
+    """
+    Прогресс выполняемой задачи. Копится в памяти и периодически сохраняется в БД из отдельного потока,
+    который заодно продлевает захват задачи воркером.
+
+    Heartbeat сохраняет только прогресс треков. Обработанные архивы и метаданные треков сохраняет
+    только поток обработки: снимок heartbeat, записанный позже checkpoint архива, иначе вернул бы
+    done_archives к старому значению, и после падения воркера архив был бы загружен повторно
+    """
+
+    def __init__(self, job: UploadJobDbEntity, worker_id: str):
+        self.job_id = job.id
+        self.worker_id = worker_id
+        self.done_archives = job.done_archives
+        self.__tracks = dict(job.tracks or {})
+        self.__files = list(job.files or [])
+        self.__lock = threading.Lock()
+        self.__is_owned = True
+        self.__stopped = threading.Event()
+        self.__thread = threading.Thread(target=self.__heartbeat, name=f"heartbeat-{job.id}", daemon=True)
+
+    def __enter__(self):
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.__stopped.set()
+        self.__thread.join()
+
+    def on_progress(self, progress: TrackProgress):
+        track = TrackProgressDto(
+            track_id=progress.track_id,
+            original_name=progress.original_name,
+            stage=progress.stage.value,
+            error=progress.error,
+        )
+        with self.__lock:
+            self.__tracks[track.track_id] = track.model_dump()
+        # Прерываем обработку архива, как только выяснилось, что задачу выполняет другой воркер
+        self.ensure_owned()
+
+    def archive_checkpoint(self, files: List[FileDto]) -> Update:
+        """
+        Запрос, отмечающий текущий архив обработанным. Выполняется в одной транзакции с сохранением
+        метаданных треков, поэтому при повторе задачи треки архива не будут созданы повторно
+        """
+        with self.__lock:
+            return job_repository.progress_statement(
+                job_id=self.job_id,
+                worker_id=self.worker_id,
+                tracks=dict(self.__tracks),
+                files=self.__files + [file.model_dump() for file in files],
+                done_archives=self.done_archives + 1,
+            )
+
+    def on_archive_done(self, files: List[FileDto]):
+        with self.__lock:
+            self.__files.extend(file.model_dump() for file in files)
+            self.done_archives += 1
+        # Обработанный архив фиксируется сразу: при повторе задачи он будет пропущен.
+        # Для архива без треков checkpoint не выполнялся, и это единственное сохранение
+        if not self.flush(with_archives=True):
+            raise LeaseLost(self.job_id)
+
+    def ensure_owned(self):
+        """
+        Raises
+        ------
+        LeaseLost
+            если задачу захватил другой воркер
+        """
+        if not self.__is_owned:
+            raise LeaseLost(self.job_id)
+
+    def flush(self, with_archives: bool = False) -> bool:
+        """
+        Сохранение прогресса треков. С with_archives сохраняются и обработанные архивы
+        (вызывается только из потока обработки)
+        """
+        with self.__lock:
+            tracks = dict(self.__tracks)
+            files = list(self.__files) if with_archives else None
+            done_archives = self.done_archives if with_archives else None
+        is_owned = job_repository.save_progress(
+            job_id=self.job_id,
+            worker_id=self.worker_id,
+            tracks=tracks,
+            files=files,
+            done_archives=done_archives,
+        )
+        if not is_owned:
+            self.__is_owned = False
+            logger.warning(f"Upload job {self.job_id} was taken over by another worker")
+        return is_owned
+
+    def __heartbeat(self):
+        while not self.__stopped.wait(config.JOB_HEARTBEAT_SECONDS):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception(f"Failed to save progress of upload job {self.job_id}")
+
+
+def process_job(job: UploadJobDbEntity, worker_id: str):
+    """
+    Выполнение захваченной задачи загрузки.
+    При ошибке задача возвращается в очередь с экспоненциальной задержкой, пока не закончатся попытки
+    """
+    try:
+        with _JobReporter(job=job, worker_id=worker_id) as reporter:
+            for index, archive in enumerate(job.archives):
+                if index < reporter.done_archives:
+                    continue
+                reporter.ensure_owned()
+
+                # Архив распаковывается прямо из потока MinIO, на диск копируется только zip
+                with minio_repository.open_object(object_name=archive["object_name"]) as source:
+                    files = ingest_archive(
+                        source=source,
+                        archive_name=archive["name"],
+                        owner_id=job.owner_id,
+                        custom_dir=job.custom_dir,
+                        on_progress=reporter.on_progress,
+                        checkpoint=reporter.archive_checkpoint,
+                    )
+
+                reporter.on_archive_done(files)
+    except (LeaseLost, CheckpointRejected):
+        # Задачу выполняет другой воркер: ни завершать, ни повторять ее нельзя
+        logger.warning(f"Upload job {job.id} stopped on worker {worker_id}: the job was taken over")
+        return
+    except Exception as e:
+        logger.exception(f"Upload job {job.id} failed on attempt {job.attempts}")
+        retry_at = None
+        if job.attempts < config.JOB_MAX_ATTEMPTS:
+            delay = config.JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+            retry_at = datetime.now(UTC) + timedelta(seconds=delay)
+        job_repository.fail_job(job_id=job.id, worker_id=worker_id, error=str(e), retry_at=retry_at)
+        if retry_at is None:
+            __remove_staged_archives(job.archives)
+        return
+
+    job_repository.complete_job(job_id=job.id, worker_id=worker_id)
+    __remove_staged_archives(job.archives)
+
+
+def run_worker(worker_id: str, stop_event: threading.Event):
+    """
+    Цикл воркера: захватывает задачи из очереди и выполняет их, пока не будет установлен stop_event
+    """
+    logger.info(f"Upload worker {worker_id} started")
+    while not stop_event.is_set():
+        try:
+            stale_jobs = job_repository.release_stale_jobs(
+                lease_seconds=config.JOB_LEASE_SECONDS,
+                max_attempts=config.JOB_MAX_ATTEMPTS,
+                retry_base_seconds=config.JOB_RETRY_BASE_SECONDS,
+            )
+            for stale_job_id, archives in stale_jobs:
+                logger.error(f"Upload job {stale_job_id} failed: its worker stopped on every attempt")
+                __remove_staged_archives(archives)
+
+            job = job_repository.claim_job(worker_id=worker_id)
+            if job is None:
+                job_repository.remove_finished_jobs(older_than=timedelta(seconds=config.UPLOAD_JOB_TTL_SECONDS))
+                stop_event.wait(config.JOB_POLL_SECONDS)
+                continue
+            process_job(job=job, worker_id=worker_id)
+        except Exception:
+            logger.exception(f"Upload worker {worker_id} iteration failed")
+            stop_event.wait(config.JOB_POLL_SECONDS)
+    logger.info(f"Upload worker {worker_id} stopped")
+
+
+def start_workers(count: int, stop_event: threading.Event) -> List[threading.Thread]:
+    """
+    Запуск count воркеров в потоках текущего процесса
+    """
+    threads = []
+    for index in range(count):
+        worker_id = f"{socket.gethostname()}-{os.getpid()}-{index}"
+        thread = threading.Thread(target=run_worker, args=(worker_id, stop_event), name=f"upload-worker-{index}")
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def __remove_staged_archives(archives: List[dict]):
+    for archive in archives:
+        try:
+            minio_repository.remove_object(object_name=archive["object_name"])
+        except Exception:
+            logger.exception(f"Failed to remove staged archive {archive['object_name']}")
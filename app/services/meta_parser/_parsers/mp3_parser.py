@@ -1,16 +1,30 @@
 import re
 from typing import Union
 
-from ...decoding.decoding import get_audio_params
+from ...decoding.probe import ProbeResult
 from ..base_meta_parser import BaseMetaParser
 from ..metadata import TrackMetaData
 
 
 class MP3Parser(BaseMetaParser):
-    def get_metadata(self, name: str) -> TrackMetaData:
+    def matches(self, header: bytes) -> bool:
+        # Файл начинается с тега ID3v2
+        if header.startswith(b"ID3"):
+            return True
 
-        data = get_audio_params(name)
-        tags: dict = data["tags"]
+        # Файл начинается сразу с MPEG-фрейма: 11 бит синхронизации,
+        # валидные версия, слой, индекс битрейта и частоты
+        if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+            return False
+        version = (header[1] >> 3) & 0x03
+        layer = (header[1] >> 1) & 0x03
+        bitrate_index = header[2] >> 4
+        sample_rate_index = (header[2] >> 2) & 0x03
+        return version != 0x01 and layer != 0x00 and bitrate_index != 0x0F and sample_rate_index != 0x03
+
+    def get_metadata(self, probe: ProbeResult) -> TrackMetaData:
+
+        tags: dict = probe.tags
 
         return TrackMetaData(
             track_title=tags["track_title"],
@@ -18,7 +32,7 @@ class MP3Parser(BaseMetaParser):
             album=tags["album"],
             artist=tags["artist"],
             genre=tags["genre"],
-            mime=tags["mime"],
+            mime=probe.mime,
         )
 
     def __get_track_number(self, raw: Union[str, None]) -> str:
@@ -1,9 +1,22 @@
 from abc import ABC, abstractmethod
 
+from ..decoding.probe import ProbeResult
 from ..meta_parser.metadata import TrackMetaData
 
 
 class BaseMetaParser(ABC):
     @abstractmethod
-    def get_metadata(self, name: str) -> TrackMetaData:
+    def matches(self, header: bytes) -> bool:
+        """
+        Определяет по первым байтам файла, может ли парсер его обработать
+
+        Parameters
+        ----------
+        header
+            первые байты файла (не больше factory.HEADER_SIZE)
+        """
+        pass
+
+    @abstractmethod
+    def get_metadata(self, probe: ProbeResult) -> TrackMetaData:
         pass
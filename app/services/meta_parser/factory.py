@@ -1,19 +1,36 @@
-from io import BytesIO
-from pathlib import Path
-from typing import Optional
-
-import mutagen
-from mutagen.mp3 import MP3
+from typing import List, Optional
 
 from ._parsers.mp3_parser import MP3Parser
 from .base_meta_parser import BaseMetaParser
 
-__mp3_parcer = MP3Parser()
+# Количество байт из начала файла, по которым определяется формат
+HEADER_SIZE = 4096
+
+__parsers: List[BaseMetaParser] = []
+
+
+def register_parser(parser: BaseMetaParser):
+    """
+    Регистрация парсера нового формата. Парсеры опрашиваются в порядке регистрации
+    """
+    __parsers.append(parser)
+
+
+def unregister_parser(parser: BaseMetaParser):
+    """
+    Удаление зарегистрированного парсера
+    """
+    __parsers.remove(parser)
+
+
+def detect_parser(header: bytes) -> Optional[BaseMetaParser]:
+    """
+    Поиск парсера по первым байтам файла
+    """
+    for parser in __parsers:
+        if parser.matches(header):
+            return parser
+    return None
+
 
-def get_parser(file: str) -> Optional[BaseMetaParser]:
-    content_bytes = Path(file).read_bytes()
-    f = mutagen.File(BytesIO(content_bytes), easy=False)
-    if isinstance(f, MP3):
-        return __mp3_parcer
-    else:
-        return None
+register_parser(MP3Parser())
@@ -0,0 +1,64 @@
+import unittest
+
+from app.services.meta_parser._parsers.mp3_parser import MP3Parser
+from app.services.meta_parser.base_meta_parser import BaseMetaParser
+from app.services.meta_parser.factory import detect_parser, register_parser, unregister_parser
+
+
+class TestMp3Sniffing(unittest.TestCase):
+    def test_id3_header(self):
+        self.assertTrue(MP3Parser().matches(b"ID3\x04\x00\x00\x00\x00\x00\x00"))
+
+    def test_frame_sync(self):
+        # MPEG-1 Layer III, 128 kbit/s, 44.1 kHz
+        self.assertTrue(MP3Parser().matches(bytes([0xFF, 0xFB, 0x90, 0x64])))
+
+    def test_invalid_frame_header(self):
+        input_headers = [
+            b"",
+            b"\xff",
+            b"PK\x03\x04",
+            b"fLaC\x00\x00\x00\x22",
+            bytes([0xFF, 0xFB, 0xF0, 0x64]),  # недопустимый индекс битрейта
+            bytes([0xFF, 0xFB, 0x9C, 0x64]),  # недопустимый индекс частоты
+            bytes([0xFF, 0xF9, 0x90, 0x64]),  # слой 00 зарезервирован
+        ]
+
+        for header in input_headers:
+            self.assertFalse(MP3Parser().matches(header), header)
+
+
+class TestParserRegistry(unittest.TestCase):
+    def test_detect_mp3(self):
+        self.assertIsInstance(detect_parser(b"ID3\x03\x00"), MP3Parser)
+
+    def test_unknown_format(self):
+        self.assertIsNone(detect_parser(b"\x00" * 16))
+
+    def test_register_parser(self):
+        class FlacParser(BaseMetaParser):
+            def matches(self, header: bytes) -> bool:
+                return header.startswith(b"fLaC")
+
+            def get_metadata(self, probe):
+                pass
+
+        parser = FlacParser()
+        register_parser(parser)
+        self.addCleanup(unregister_parser, parser)
+
+        self.assertIs(detect_parser(b"fLaC\x00\x00\x00\x22"), parser)
+
+    def test_unregister_parser(self):
+        class FlacParser(BaseMetaParser):
+            def matches(self, header: bytes) -> bool:
+                return header.startswith(b"fLaC")
+
+            def get_metadata(self, probe):
+                pass
+
+        parser = FlacParser()
+        register_parser(parser)
+        unregister_parser(parser)
+
+        self.assertIsNone(detect_parser(b"fLaC\x00\x00\x00\x22"))
@@ -0,0 +1,28 @@
+"""
+Отдельный процесс обработки задач загрузки: python -m app.worker
+
+Воркеры забирают задачи из общей очереди в Postgres, поэтому процессов можно запускать сколько угодно
+на любых узлах с доступом к той же БД и MinIO
+"""
+import logging
+import signal
+import threading
+
+from .core import config
+from .services.ingest.worker import start_workers
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+
+    stop_event = threading.Event()
+    # Получив сигнал, воркеры доделывают текущие задачи и завершаются
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+    for thread in start_workers(count=config.INGEST_WORKER_THREADS, stop_event=stop_event):
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()